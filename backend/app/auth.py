@@ -1,5 +1,6 @@
+import time
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
@@ -7,12 +8,28 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from .config import settings
 from .database import get_database
 from .models import UserResponse
+from .services.cache import TTLCache
+from .services.hashing_pool import hashing_pool
 from bson import ObjectId
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# min_rounds makes hashes below the configured cost "need update", so
+# verify_and_update hands back a stronger hash on the next login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.bcrypt_rounds,
+    bcrypt__min_rounds=settings.bcrypt_rounds
+)
 security = HTTPBearer()
 
+# Authenticated users by id, so most requests skip the users lookup.
+# Entries are dropped when the profile changes; other uvicorn workers can
+# serve the old profile for up to AUTH_USER_CACHE_TTL_SECONDS.
+user_cache = TTLCache(settings.auth_user_cache_max_entries, settings.auth_user_cache_ttl_seconds)
+# Verified tokens -> user id, each kept until the token's own exp
+token_cache = TTLCache(settings.auth_token_cache_max_entries, settings.access_token_expire_minutes * 60)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -22,6 +39,16 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def hash_password(password: str) -> str:
+    """get_password_hash on the hashing pool, off the event loop"""
+    return await hashing_pool.run(get_password_hash, password)
+
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify on the hashing pool; also returns a replacement hash when the stored one is outdated"""
+    return await hashing_pool.run(pwd_context.verify_and_update, plain_password, hashed_password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -34,6 +61,35 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
+def invalidate_user(user_id):
+    """Forget a cached user after their record changes"""
+    user_cache.pop(str(user_id))
+
+
+def auth_cache_stats() -> Dict[str, Any]:
+    return {"users": user_cache.stats(), "tokens": token_cache.stats()}
+
+
+def _verify_token(token: str) -> Optional[str]:
+    """User id from a valid token, or None"""
+    user_id = token_cache.get(token)
+    if user_id is not None:
+        return user_id
+    
+    try:
+        payload = jwt.decode(token, settings.jwt_secret_key, algorithms=[settings.algorithm])
+    except JWTError:
+        return None
+    user_id = payload.get("sub")
+    if user_id is None:
+        return None
+    
+    expires_in = payload.get("exp", 0) - time.time()
+    if expires_in > 0:
+        token_cache.set(token, user_id, ttl_seconds=expires_in)
+    return user_id
+
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db=Depends(get_database)
@@ -44,20 +100,28 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    try:
-        payload = jwt.decode(
-            credentials.credentials, 
-            settings.jwt_secret_key, 
-            algorithms=[settings.algorithm]
-        )
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-    except JWTError:
+    user_id = _verify_token(credentials.credentials)
+    if user_id is None:
         raise credentials_exception
     
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        return cached
+    
     user = await db.users.find_one({"_id": ObjectId(user_id)})
     if user is None:
         raise credentials_exception
     
-    return UserResponse(**user)
+    current_user = UserResponse(**user)
+    user_cache.set(user_id, current_user)
+    return current_user
+
+
+async def get_current_admin(current_user: UserResponse = Depends(get_current_user)) -> UserResponse:
+    """Current user, if their email is listed in ADMIN_EMAILS"""
+    if current_user.email.lower() not in {email.lower() for email in settings.admin_emails}:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return current_user
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
@@ -7,6 +7,120 @@ class Settings(BaseSettings):
     jwt_secret_key: str = "your-secret-key-change-in-production"
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
+
+    # MongoDB connection pool (0 = driver default / no limit)
+    mongo_max_pool_size: int = 100
+    mongo_min_pool_size: int = 5  # opened at startup and kept, so first requests don't pay for connecting
+    mongo_max_idle_time_ms: int = 0
+    mongo_connect_timeout_ms: int = 10000
+    mongo_server_selection_timeout_ms: int = 5000
+    mongo_socket_timeout_ms: int = 0
+    mongo_wait_queue_timeout_ms: int = 0
+    mongo_compressors: str = ""  # e.g. "zstd,zlib"; zstd needs the zstandard package
+    mongo_migrate_on_startup: bool = True  # else run python -m app.migrations before deploying
+
+    # Readiness (/ready)
+    ready_timeout_seconds: float = 2
+
+    # Password hashing (bcrypt runs on its own bounded thread pool)
+    bcrypt_rounds: int = 12  # older hashes are upgraded on the next login
+    password_hash_workers: int = 2
+    password_hash_max_queue: int = 64
+    password_hash_retry_after_seconds: int = 1
+
+    # Authenticated-user cache (per process)
+    auth_user_cache_max_entries: int = 10000
+    auth_user_cache_ttl_seconds: int = 60
+    auth_token_cache_max_entries: int = 10000
+
+    # OCR worker pool
+    ocr_executor: str = "process"  # "process" or "thread"
+    ocr_workers: int = 0  # 0 = one worker per CPU core
+    ocr_max_queue: int = 32
+    ocr_retry_after_seconds: int = 5
+
+    # OCR deadlines (requests may ask for less or more, up to the maximum)
+    ocr_timeout_seconds: float = 60
+    ocr_document_timeout_seconds: float = 600
+    ocr_max_timeout_seconds: float = 900
+
+    # Per-user OCR admission control and fair scheduling
+    ocr_rate_limit_enabled: bool = True
+    ocr_rate_per_minute: float = 30
+    ocr_rate_burst: int = 20
+    ocr_rate_max_users: int = 10000  # in-process buckets kept
+    ocr_rate_limit_mongo: bool = False  # share limits across uvicorn workers
+    ocr_scheduler_slots: int = 0  # concurrent OCR requests, 0 = one per OCR worker
+    ocr_user_max_queued: int = 16  # per user, waiting for a slot
+
+    # Upload limits
+    max_upload_bytes: int = 25 * 1024 * 1024
+    max_document_upload_bytes: int = 200 * 1024 * 1024  # multi-page TIFF/PDF
+    max_image_pixels: int = 80_000_000
+    upload_spool_bytes: int = 4 * 1024 * 1024  # larger uploads go to a temp file
+
+    # OCR engine
+    ocr_engine: str = "auto"  # "auto", "tesserocr" or "pytesseract"
+    tesseract_cmd: Optional[str] = None  # auto-detected when unset
+    tesseract_lang: str = "eng"
+    tessdata_prefix: Optional[str] = None
+
+    # Response compression (gzip is negotiated via Accept-Encoding)
+    gzip_minimum_size: int = 1024
+    gzip_level: int = 6
+
+    # Document listing
+    documents_page_size: int = 50
+    documents_max_page_size: int = 200
+    documents_snippet_length: int = 200  # characters per text in the summary view
+    documents_search_max_offset: int = 1000
+    documents_bulk_max_operations: int = 1000
+
+    # Export / import
+    documents_export_batch_size: int = 500  # documents per cursor batch
+    documents_import_batch_size: int = 500  # documents per insert_many
+    documents_import_max_errors: int = 100  # row errors reported back
+    admin_emails: List[str] = []  # may use /admin, e.g. ADMIN_EMAILS='["ops@example.com"]'
+
+    # Batch uploads
+    ocr_batch_max_files: int = 100
+    ocr_batch_concurrency: int = 4
+
+    # Processed-image previews (served from /documents/previews/{id})
+    preview_max_dimension: int = 1600
+    preview_format: str = "webp"  # "webp" or "jpeg"
+    preview_quality: int = 80
+    preview_store_max_bytes: int = 64 * 1024 * 1024  # per API process
+
+    # Multi-page TIFF/PDF documents
+    max_document_pages: int = 200
+    ocr_page_concurrency: int = 4
+    pdf_render_dpi: int = 300
+
+    # Preprocessing: longer sides are downscaled (during JPEG decode when possible)
+    ocr_max_image_dimension: int = 4096
+    # Downscale (never enlarge) so text lines are about this many pixels tall before OCR
+    ocr_normalize_resolution: bool = True
+    ocr_target_text_height: int = 40
+
+    # Async OCR jobs (app.worker)
+    ocr_job_poll_interval_seconds: float = 0.5
+    ocr_job_lease_seconds: int = 300
+    ocr_job_max_attempts: int = 3
+    ocr_job_retry_backoff_seconds: float = 5  # doubled for each attempt already made
+    ocr_job_max_wait_seconds: int = 30
+    ocr_job_ttl_seconds: int = 86400
+
+    # OCR result cache
+    ocr_cache_enabled: bool = True
+    ocr_cache_max_entries: int = 512
+    ocr_cache_ttl_seconds: int = 3600
+    ocr_cache_mongo: bool = False  # share cached results across workers/restarts
+
+    # Original uploads kept in GridFS, once per distinct image, for re-OCR
+    image_storage_enabled: bool = False
+    image_storage_orphan_grace_seconds: int = 86400  # unreferenced images are deleted after this
+    image_storage_sweep_interval_seconds: int = 3600
     
     class Config:
         env_file = ".env"
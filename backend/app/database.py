@@ -1,5 +1,6 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 from .config import settings
+from .services.metrics import mongo_listener
 
 
 class Database:
@@ -14,15 +15,38 @@ async def get_database():
     return db.database
 
 
+def client_options() -> dict:
+    """Pool, timeout and compression options for the Motor client from settings"""
+    options = {
+        "maxPoolSize": settings.mongo_max_pool_size,
+        "minPoolSize": settings.mongo_min_pool_size,
+        "maxIdleTimeMS": settings.mongo_max_idle_time_ms or None,
+        "connectTimeoutMS": settings.mongo_connect_timeout_ms,
+        "serverSelectionTimeoutMS": settings.mongo_server_selection_timeout_ms,
+        "socketTimeoutMS": settings.mongo_socket_timeout_ms or None,
+        "waitQueueTimeoutMS": settings.mongo_wait_queue_timeout_ms or None,
+    }
+    if settings.mongo_compressors:
+        options["compressors"] = settings.mongo_compressors
+    return options
+
+
 async def connect_to_mongo():
-    """Create database connection"""
-    db.client = AsyncIOMotorClient(settings.mongo_uri)
+    """Create database connection
+
+    Pings the server so a bad URI fails startup and the pool has its first
+    connection before any request needs one. Indexes are created by the
+    versioned steps in app.migrations.
+    """
+    db.client = AsyncIOMotorClient(settings.mongo_uri, event_listeners=[mongo_listener], **client_options())
     db.database = db.client.get_database()
-    
-    # Create indexes
-    await db.database.users.create_index("email", unique=True)
-    await db.database.users.create_index("username", unique=True)
-    await db.database.documents.create_index("user_id")
+    await ping_database()
+
+
+async def ping_database():
+    if db.client is None:
+        raise RuntimeError("MongoDB client is not connected")
+    await db.client.admin.command("ping")
 
 
 async def close_mongo_connection():
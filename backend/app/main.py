@@ -1,17 +1,66 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+import time
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from contextlib import asynccontextmanager
 
-from .database import connect_to_mongo, close_mongo_connection
-from .routers import auth, users, documents
+from fastapi.responses import PlainTextResponse
+from .auth import auth_cache_stats
+from .config import settings
+from .database import connect_to_mongo, close_mongo_connection, db, ping_database
+from .migrations import apply_migrations
+from .responses import FastJSONResponse
+from .services.hashing_pool import hashing_pool
+from .services.metrics import StageTimer, http_request_bytes, http_request_seconds, http_response_bytes, metrics
+from .services.ocr_cache import ocr_cache
+from .services.ocr_pool import ocr_pool
+from .services.ocr_scheduler import ocr_scheduler
+from .services.ocr_service import OCRService
+from .services.preview_store import preview_store
+from .routers import auth, users, documents, admin
+
+
+logger = logging.getLogger("app")
+
+
+class StartupState:
+    """What /ready reports: whether startup finished, and how long each phase took"""
+
+    def __init__(self):
+        self.complete = False
+        self.ocr_error = None
+        self.timer = StageTimer()
+
+
+startup = StartupState()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup
-    await connect_to_mongo()
+    # Startup, timed per phase
+    timer = startup.timer
+    with timer.stage("mongo_connect"):
+        await connect_to_mongo()
+    if settings.mongo_migrate_on_startup:
+        with timer.stage("migrations"):
+            await apply_migrations(db.database)
+    with timer.stage("hashing_pool"):
+        hashing_pool.start()
+    with timer.stage("ocr_warm"):
+        ocr_pool.start(initializer=OCRService.warm_up)
+        errors = [error for error in await ocr_pool.warm() if error]
+        startup.ocr_error = errors[0] if errors else None
+    startup.complete = True
+    logger.info(
+        "Started in %.2fs (%s)", sum(timer.timings.values()),
+        ", ".join(f"{phase} {seconds:.2f}s" for phase, seconds in timer.timings.items())
+    )
     yield
     # Shutdown
+    ocr_pool.shutdown()
+    hashing_pool.shutdown()
     await close_mongo_connection()
 
 
@@ -19,9 +68,14 @@ app = FastAPI(
     title="Handwriting OCR API",
     description="A FastAPI application for handwriting OCR with user authentication",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
+# Compress large JSON/NDJSON/CSV bodies for clients that accept gzip
+# (images and ZIP exports are left alone by the middleware)
+app.add_middleware(GZipMiddleware, minimum_size=settings.gzip_minimum_size, compresslevel=settings.gzip_level)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -29,12 +83,40 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Server-Timing"],
 )
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    started = time.perf_counter()
+    response = await call_next(request)
+    # Label by route template, not the raw path, to keep the series bounded
+    route = request.scope.get("route")
+    path = getattr(route, "path", "unmatched")
+    http_request_seconds.observe(
+        time.perf_counter() - started, method=request.method, route=path, status=str(response.status_code)
+    )
+    if request.headers.get("content-length"):
+        http_request_bytes.observe(int(request.headers["content-length"]), method=request.method, route=path)
+    if response.headers.get("content-length"):
+        http_response_bytes.observe(int(response.headers["content-length"]), method=request.method, route=path)
+    return response
+
+
+metrics.collect("ocr_pool", ocr_pool.stats)
+metrics.collect("ocr_scheduler", ocr_scheduler.stats)
+metrics.collect("ocr_cache", ocr_cache.stats)
+metrics.collect("preview_store", preview_store.stats)
+metrics.collect("password_hashing", hashing_pool.stats)
+metrics.collect("auth_user_cache", lambda: auth_cache_stats()["users"])
+metrics.collect("auth_token_cache", lambda: auth_cache_stats()["tokens"])
+metrics.collect("startup_seconds", lambda: startup.timer.timings)
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(users.router)
 app.include_router(documents.router)
+app.include_router(admin.router)
 
 
 @app.get("/")
@@ -44,4 +126,45 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
+    """Liveness and stats; stays cheap and doesn't touch MongoDB or the OCR engine"""
+    return {
+        "status": "healthy",
+        "ocr": ocr_pool.stats(),
+        "ocr_scheduler": ocr_scheduler.stats(),
+        "ocr_cache": ocr_cache.stats(),
+        "previews": preview_store.stats(),
+        "auth_cache": auth_cache_stats(),
+        "password_hashing": hashing_pool.stats()
+    }
+
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness: startup finished, MongoDB answers a ping and the OCR engine loaded
+
+    503 otherwise, so an orchestrator only routes traffic to warm instances.
+    """
+    checks = {"startup": startup.complete, "ocr_engine": startup.complete and startup.ocr_error is None}
+    try:
+        await asyncio.wait_for(ping_database(), settings.ready_timeout_seconds)
+        checks["mongodb"] = True
+    except Exception as e:
+        logger.warning("Readiness check: MongoDB ping failed: %s", e)
+        checks["mongodb"] = False
+    
+    ready = all(checks.values())
+    return FastJSONResponse(
+        {
+            "status": "ready" if ready else "not ready",
+            "checks": checks,
+            "ocr_error": startup.ocr_error,
+            "startup_seconds": startup.timer.timings
+        },
+        status_code=200 if ready else 503
+    )
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Prometheus text exposition of request, OCR stage, MongoDB and pool metrics"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
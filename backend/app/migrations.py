@@ -0,0 +1,148 @@
+"""Versioned MongoDB schema steps: python -m app.migrations
+
+Each step runs once and is recorded in the migrations collection, so a
+restart doesn't re-issue every create_index. A step whose params (a TTL
+taken from settings, say) changed since it ran is applied again, and a step
+for a disabled feature is skipped without being recorded, so it runs once
+the feature is turned on. Steps must be idempotent: replicas starting at the
+same time may both run one.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple
+from pymongo.errors import OperationFailure
+from .config import settings
+
+
+logger = logging.getLogger(__name__)
+
+INDEX_OPTIONS_CONFLICT = 85
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    apply: Callable[[Any], Awaitable[None]]
+    params: Callable[[], Dict[str, Any]] = dict
+    enabled: Callable[[], bool] = lambda: True
+
+
+async def _ttl_index(collection, field: str, seconds: int):
+    """A TTL index on field, updated in place if it exists with another expiry"""
+    try:
+        await collection.create_index(field, expireAfterSeconds=seconds)
+    except OperationFailure as e:
+        if e.code != INDEX_OPTIONS_CONFLICT:
+            raise
+        await collection.database.command(
+            "collMod", collection.name, index={"keyPattern": {field: 1}, "expireAfterSeconds": seconds}
+        )
+
+
+async def _users(db):
+    await db.users.create_index("email", unique=True)
+    await db.users.create_index("username", unique=True)
+
+
+async def _documents_listing(db):
+    # Serves the per-user listing in (created_at, _id) order straight from the index
+    await db.documents.create_index([("user_id", 1), ("created_at", -1), ("_id", -1)])
+    # It also covers plain user_id lookups, which had an index of their own
+    if "user_id_1" in await db.documents.index_information():
+        await db.documents.drop_index("user_id_1")
+
+
+async def _documents_text_search(db):
+    # Text index with a user_id prefix: every search is scoped to one user's documents
+    await db.documents.create_index(
+        [("user_id", 1), ("original_text", "text"), ("corrected_text", "text")],
+        name="user_text_search"
+    )
+
+
+async def _ocr_jobs(db):
+    await db.ocr_jobs.create_index([("state", 1), ("created_at", 1)])
+    await db.ocr_jobs.create_index("user_id")
+
+
+async def _ocr_jobs_ttl(db):
+    await _ttl_index(db.ocr_jobs, "finished_at", settings.ocr_job_ttl_seconds)
+
+
+async def _ocr_rate_limits_ttl(db):
+    await _ttl_index(db.ocr_rate_limits, "expires_at", 0)
+
+
+async def _ocr_cache_ttl(db):
+    await _ttl_index(db.ocr_cache, "created_at", settings.ocr_cache_ttl_seconds)
+
+
+async def _image_storage(db):
+    # Finds the documents still using an image before the sweep deletes it
+    await db.documents.create_index("image_id", sparse=True)
+    await db.source_images.create_index([("refs", 1), ("last_used_at", 1)])
+
+
+MIGRATIONS = [
+    Migration(1, "users_unique_email_username", _users),
+    Migration(2, "documents_listing_index", _documents_listing),
+    Migration(3, "documents_text_search", _documents_text_search),
+    Migration(4, "ocr_jobs_indexes", _ocr_jobs),
+    Migration(5, "ocr_jobs_ttl", _ocr_jobs_ttl, params=lambda: {"ttl": settings.ocr_job_ttl_seconds}),
+    Migration(6, "ocr_rate_limits_ttl", _ocr_rate_limits_ttl, enabled=lambda: settings.ocr_rate_limit_mongo),
+    Migration(
+        7, "ocr_cache_ttl", _ocr_cache_ttl,
+        params=lambda: {"ttl": settings.ocr_cache_ttl_seconds},
+        enabled=lambda: settings.ocr_cache_mongo
+    ),
+    Migration(8, "image_storage_indexes", _image_storage, enabled=lambda: settings.image_storage_enabled),
+]
+
+
+async def apply_migrations(db) -> List[str]:
+    """Run the steps not yet applied, in version order; returns their names"""
+    applied = {doc["_id"]: doc async for doc in db.migrations.find()}
+    ran = []
+    for migration in MIGRATIONS:
+        if not migration.enabled():
+            continue
+        params = migration.params()
+        record = applied.get(migration.version)
+        if record is not None and record.get("params", {}) == params:
+            continue
+
+        started = time.perf_counter()
+        await migration.apply(db)
+        seconds = time.perf_counter() - started
+        await db.migrations.replace_one(
+            {"_id": migration.version},
+            {
+                "_id": migration.version,
+                "name": migration.name,
+                "params": params,
+                "applied_at": datetime.utcnow(),
+                "seconds": seconds
+            },
+            upsert=True
+        )
+        logger.info("Applied migration %d %s in %.2fs", migration.version, migration.name, seconds)
+        ran.append(migration.name)
+    return ran
+
+
+async def main():
+    from .database import close_mongo_connection, connect_to_mongo, db
+
+    await connect_to_mongo()
+    try:
+        ran = await apply_migrations(db.database)
+        logger.info("%d migrations applied", len(ran))
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    asyncio.run(main())
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field, field_validator
-from typing import Optional, Annotated, Dict
+from typing import Optional, Annotated, Dict, List, Literal, Tuple
 from datetime import datetime
 from bson import ObjectId
 
@@ -55,6 +55,7 @@ class Token(BaseModel):
 class DocumentCreate(BaseModel):
     original_text: str
     corrected_text: Optional[str] = None
+    image_id: Optional[str] = None  # OCRResponse.image_id of the stored upload
 
 
 class DocumentUpdate(BaseModel):
@@ -66,6 +67,7 @@ class DocumentResponse(BaseModel):
     user_id: PyObjectId
     original_text: str
     corrected_text: Optional[str] = None
+    image_id: Optional[str] = None  # stored source image, when kept
     created_at: datetime
 
     @field_validator('id', 'user_id', mode='before')
@@ -80,15 +82,144 @@ class DocumentResponse(BaseModel):
     }
 
 
+class DocumentBulkOperation(BaseModel):
+    op: Literal["create", "update", "delete"]
+    id: Optional[str] = None  # update and delete
+    original_text: Optional[str] = None  # create
+    corrected_text: Optional[str] = None  # create and update
+
+
+class DocumentBulkRequest(BaseModel):
+    operations: List[DocumentBulkOperation] = Field(..., min_length=1)
+
+
+class DocumentBulkItemResult(BaseModel):
+    index: int
+    op: str
+    status: str  # ok, not_found, invalid or error
+    id: Optional[str] = None
+    detail: Optional[str] = None
+
+
+class DocumentBulkResponse(BaseModel):
+    created: int = 0
+    updated: int = 0
+    deleted: int = 0
+    failed: int = 0
+    results: List[DocumentBulkItemResult]
+
+
+class DocumentImportError(BaseModel):
+    item: int  # line number, or entry number in a ZIP
+    detail: str
+
+
+class DocumentImportResponse(BaseModel):
+    imported: int
+    failed: int
+    errors: List[DocumentImportError]  # the first DOCUMENTS_IMPORT_MAX_ERRORS
+
+
+class DocumentSummary(DocumentResponse):
+    """Document list entry; in the summary view the texts are cut to a snippet"""
+    truncated: bool = False
+
+
+class DocumentStatsResponse(BaseModel):
+    documents: int
+    corrected: int  # documents with a non-empty corrected_text
+    original_characters: int
+    corrected_characters: int
+    correction_rate: float  # corrected / documents
+    updated_at: Optional[datetime] = None
+
+
+class DocumentSearchHit(BaseModel):
+    id: PyObjectId = Field(alias="_id")
+    created_at: datetime
+    score: float
+    field: str  # original_text or corrected_text
+    snippet: str
+    highlights: List[Tuple[int, int]]  # [start, end) offsets into snippet
+
+    model_config = {
+        "populate_by_name": True,
+        "arbitrary_types_allowed": True,
+        "json_encoders": {ObjectId: str}
+    }
+
+
+class DocumentSearchResponse(BaseModel):
+    query: str
+    results: List[DocumentSearchHit]
+    next_offset: Optional[int] = None
+
+
 class PreprocessingOptions(BaseModel):
     rotation: int = 0  # 0, 90, 180, 270 degrees
     crop: Optional[Dict[str, int]] = None  # {x, y, width, height}
     grayscale: bool = False
     enhance_contrast: bool = False
+    binarize: bool = False  # Otsu threshold to black and white
+    normalize_resolution: Optional[bool] = None  # None = server default
+    target_text_height: Optional[int] = Field(None, ge=8, le=200)  # pixels
+    region_parallel: bool = False  # recognize Tesseract's text blocks on several workers (tesserocr only)
 
 
 class OCRResponse(BaseModel):
     extracted_text: str
-    processed_preview: Optional[str] = None
+    processed_preview: Optional[str] = None  # URL of the processed-image preview
+    preview_id: Optional[str] = None
+    original_size: Optional[tuple] = None
+    processed_size: Optional[tuple] = None
+    scale: Optional[float] = None  # processed / original resolution
+    text_height: Optional[float] = None  # estimated text line height, in original pixels
+    regions: Optional[int] = None  # text regions recognized in parallel, if requested
+    timings: Optional[Dict[str, float]] = None  # seconds per stage (also sent as Server-Timing)
+    image_id: Optional[str] = None  # SHA-256 of the stored upload, when IMAGE_STORAGE_ENABLED
+
+
+class ReOCRRequest(BaseModel):
+    preprocessing_options: Optional[Dict] = None
+    timeout: Optional[float] = Field(None, gt=0)
+    save: bool = True  # replace the document's original_text with the new result
+
+
+class PageOCRResult(BaseModel):
+    page: int
+    extracted_text: Optional[str] = None
     original_size: Optional[tuple] = None
     processed_size: Optional[tuple] = None
+    scale: Optional[float] = None
+    text_height: Optional[float] = None
+    timings: Optional[Dict[str, float]] = None
+    error: Optional[str] = None
+
+
+class DocumentOCRResponse(BaseModel):
+    page_count: int
+    extracted_text: str
+    pages: List[PageOCRResult]
+    elapsed_seconds: float
+
+
+class OCRJobResponse(BaseModel):
+    id: PyObjectId = Field(default_factory=ObjectId, alias="_id")
+    state: str  # queued, running, completed, failed
+    attempts: int = 0
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    result: Optional[OCRResponse] = None
+    error: Optional[str] = None
+
+    @field_validator('id', mode='before')
+    @classmethod
+    def validate_id(cls, v):
+        return validate_object_id(v)
+
+    model_config = {
+        "populate_by_name": True,
+        "arbitrary_types_allowed": True,
+        "json_encoders": {ObjectId: str}
+    }
@@ -0,0 +1,41 @@
+"""Recompute per-user document stats from the documents: python -m app.rebuild_stats
+
+    python -m app.rebuild_stats                 # every user
+    python -m app.rebuild_stats --user-id <id>  # one user
+
+Run it once after the release that adds the counters is fully rolled out,
+to fill them in for existing documents, and for repair after they drifted,
+e.g. a handler failing between its document write and the $inc. Writes made
+while it runs may be miscounted, so run it when the affected users are
+quiet; for that reason it is not a startup migration.
+"""
+import argparse
+import asyncio
+import logging
+
+from bson import ObjectId
+
+from .database import close_mongo_connection, connect_to_mongo, db
+from .services.document_stats import DocumentStats
+
+
+logger = logging.getLogger("app.rebuild_stats")
+
+
+async def main(user_id=None):
+    await connect_to_mongo()
+    try:
+        written = await DocumentStats.rebuild(db.database, user_id)
+        logger.info("Rebuilt document stats for %d users", written)
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    parser = argparse.ArgumentParser(description="Recompute per-user document stats")
+    parser.add_argument("--user-id", help="only this user")
+    args = parser.parse_args()
+    if args.user_id is not None and not ObjectId.is_valid(args.user_id):
+        parser.error("--user-id is not a valid ObjectId")
+    asyncio.run(main(ObjectId(args.user_id) if args.user_id else None))
@@ -0,0 +1,52 @@
+import json
+from datetime import datetime
+from typing import Any, Dict
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        # orjson handles datetimes itself; this is for the stdlib fallback
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response encoded by orjson, with ObjectId and datetime handled natively
+
+    Used as the app's default response class. Handlers can also return one
+    directly with raw MongoDB documents, which skips response_model
+    validation entirely; only do that for documents read from our own
+    collections.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def document_row(doc: Dict[str, Any], summary: bool = False) -> Dict[str, Any]:
+    """A documents collection entry shaped like a serialized DocumentResponse
+
+    With summary, shaped like DocumentSummary instead.
+    """
+    row = {
+        "_id": doc["_id"],
+        "user_id": doc["user_id"],
+        "original_text": doc["original_text"],
+        "corrected_text": doc.get("corrected_text"),
+        "image_id": doc.get("image_id"),
+        "created_at": doc["created_at"],
+    }
+    if summary:
+        row["truncated"] = doc.get("truncated", False)
+    return row
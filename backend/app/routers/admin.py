@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
+from ..config import settings
+from ..database import get_database
+from ..models import UserResponse
+from ..auth import get_current_admin
+from ..services.document_transfer import EXPORT_FORMATS, export_filename, stream_export
+from bson import ObjectId
+
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+@router.get("/export")
+async def export_all_documents(
+    format: str = Query("ndjson", pattern="^(ndjson|csv|zip)$"),
+    user_id: str = Query(None, description="Only this user's documents"),
+    current_user: UserResponse = Depends(get_current_admin),
+    db=Depends(get_database)
+):
+    """Stream every user's documents, e.g. for backups; ZIP entries are grouped per user"""
+    if user_id is not None and not ObjectId.is_valid(user_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid user ID"
+        )
+    
+    if user_id:
+        cursor = db.documents.find({"user_id": ObjectId(user_id)}).sort([("created_at", 1), ("_id", 1)])
+    else:
+        cursor = db.documents.find({}).sort("_id", 1)
+    cursor = cursor.batch_size(settings.documents_export_batch_size)
+    
+    return StreamingResponse(
+        stream_export(cursor, format, per_user=True),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{export_filename(format, "all-documents")}"'}
+    )
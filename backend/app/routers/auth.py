@@ -2,7 +2,7 @@ from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, status
 from ..database import get_database
 from ..models import UserCreate, UserLogin, Token, UserResponse
-from ..auth import verify_password, get_password_hash, create_access_token, get_current_user
+from ..auth import hash_password, verify_and_update_password, create_access_token, get_current_user
 from bson import ObjectId
 
 
@@ -32,7 +32,7 @@ async def signup(user_data: UserCreate, db=Depends(get_database)):
             )
     
     # Hash password and create user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await hash_password(user_data.password)
     
     user_doc = {
         "username": user_data.username,
@@ -51,13 +51,21 @@ async def signup(user_data: UserCreate, db=Depends(get_database)):
 async def login(user_credentials: UserLogin, db=Depends(get_database)):
     user = await db.users.find_one({"email": user_credentials.email})
     
-    if not user or not verify_password(user_credentials.password, user["hashed_password"]):
+    verified, new_hash = False, None
+    if user:
+        verified, new_hash = await verify_and_update_password(user_credentials.password, user["hashed_password"])
+    
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # Stored hash used an older cost factor; upgrade it now we have the password
+    if new_hash:
+        await db.users.update_one({"_id": user["_id"]}, {"$set": {"hashed_password": new_hash}})
+    
     access_token = create_access_token(data={"sub": str(user["_id"])})
     return {"access_token": access_token, "token_type": "bearer"}
 
@@ -1,48 +1,611 @@
 from datetime import datetime
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, Form
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, Form, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from ..config import settings
 from ..database import get_database
-from ..models import DocumentResponse, DocumentCreate, DocumentUpdate, UserResponse, OCRResponse, PreprocessingOptions
+from ..models import DocumentResponse, DocumentSummary, DocumentSearchResponse, DocumentStatsResponse, DocumentBulkRequest, DocumentBulkResponse, DocumentBulkItemResult, DocumentImportResponse, DocumentCreate, DocumentUpdate, UserResponse, OCRResponse, OCRJobResponse, DocumentOCRResponse, PreprocessingOptions, ReOCRRequest
 from ..auth import get_current_user
+from ..responses import FastJSONResponse, document_row
+from ..services.document_search import search_hit, search_terms
+from ..services.document_stats import DocumentStats
+from ..services.document_transfer import EXPORT_FORMATS, ImportReader, export_filename, import_format, stream_export
+from ..services.image_store import IMAGE_MEDIA_TYPES, ImageStore, parse_range
+from ..services.ocr_jobs import OCRJobQueue
+from ..services.ocr_scheduler import ocr_scheduler
+from ..services.metrics import server_timing
 from ..services.ocr_service import OCRService
+from ..services.preview_store import MEDIA_TYPES, PreviewStore, preview_format, preview_store
+from ..services.upload_ingest import IMAGE_FORMATS, UploadLimitRoute, body_limit, ingest_upload
 from bson import ObjectId
+from collections import Counter
+from pymongo import DeleteOne, InsertOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
+import asyncio
+import base64
+import binascii
 import json
+import logging
 
 
-router = APIRouter(prefix="/documents", tags=["documents"])
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/documents", tags=["documents"], route_class=UploadLimitRoute)
+
+# Leave headroom under MongoDB's 16MB document limit for the job metadata
+MAX_JOB_IMAGE_BYTES = 15 * 1024 * 1024
+
+# How often a long OCR request checks whether its client is still connected
+DISCONNECT_POLL_SECONDS = 0.5
+
+
+def _parse_preprocessing_options(preprocessing_options: Optional[str]) -> Optional[dict]:
+    if not preprocessing_options:
+        return None
+    try:
+        return json.loads(preprocessing_options)
+    except json.JSONDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid preprocessing options format"
+        )
+
+
+async def _cancel_on_disconnect(request: Request, awaitable):
+    """Await OCR work, cancelling it if the client disconnects first
+
+    Cancelling drops any pool work that hasn't started and tells a running
+    worker to stop: the pytesseract engine kills its tesseract process and
+    frees the pool slot within CANCEL_POLL_SECONDS, while tesserocr can only
+    stop at the deadline.
+    """
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                # Nobody is listening; 499 only shows up in the access log
+                raise HTTPException(status_code=499, detail="Client closed request")
+    finally:
+        task.cancel()
+
+
+def _encode_cursor(doc: dict) -> str:
+    """Opaque position after doc in (created_at, _id) descending order"""
+    raw = f'{doc["created_at"].isoformat()}|{doc["_id"]}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> dict:
+    """Filter for the documents after the cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, document_id = raw.split("|")
+        created_at = datetime.fromisoformat(created_at)
+        document_id = ObjectId(document_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    return {"$or": [
+        {"created_at": {"$lt": created_at}},
+        {"created_at": created_at, "_id": {"$lt": document_id}},
+    ]}
+
+
+def _summary_projection(length: int) -> dict:
+    """Texts cut to length characters on the server, plus whether anything was cut"""
+    def snippet(field: str) -> dict:
+        return {"$cond": [
+            {"$eq": [{"$type": f"${field}"}, "string"]},
+            {"$substrCP": [f"${field}", 0, length]},
+            None
+        ]}
+    
+    def longer(field: str) -> dict:
+        return {"$gt": [{"$strLenCP": {"$ifNull": [f"${field}", ""]}}, length]}
+    
+    return {
+        "user_id": 1,
+        "created_at": 1,
+        "image_id": 1,
+        "original_text": snippet("original_text"),
+        "corrected_text": snippet("corrected_text"),
+        "truncated": {"$or": [longer("original_text"), longer("corrected_text")]},
+    }
 
 
 @router.post("/upload-image", response_model=OCRResponse)
+@body_limit(lambda: settings.max_upload_bytes)
 async def upload_and_process_image(
+    request: Request,
+    response: Response,
     file: UploadFile = File(...),
     preprocessing_options: str = Form(None),
-    current_user: UserResponse = Depends(get_current_user)
+    timeout: float = Form(None, gt=0, description="Seconds before OCR gives up with a 504"),
+    current_user: UserResponse = Depends(get_current_user),
+    db=Depends(get_database)
 ):
-    # Validate file type
-    if not file.content_type or not file.content_type.startswith('image/'):
+    # Parse preprocessing options
+    options = _parse_preprocessing_options(preprocessing_options)
+    await ocr_scheduler.admit(current_user.id)
+    
+    # Stream the upload in, checking its real format and size limits
+    with await ingest_upload(file) as upload:
+        # Process image with OCR once it's this user's turn
+        result = await _cancel_on_disconnect(
+            request,
+            ocr_scheduler.run(
+                current_user.id,
+                OCRService.extract_text_from_image(
+                    upload.source, options, upload.sha256, timeout, user_id=current_user.id
+                )
+            )
+        )
+        # Kept so the image can be OCR'd again later without a new upload
+        if settings.image_storage_enabled:
+            result["image_id"] = await ImageStore.store(db, upload)
+    
+    # Per-stage breakdown for the browser's network panel
+    response.headers["Server-Timing"] = server_timing(result["timings"])
+    return OCRResponse(**result)
+
+
+@router.post("/upload-batch")
+@body_limit(lambda: settings.max_upload_bytes * settings.ocr_batch_max_files)
+async def upload_and_process_batch(
+    files: List[UploadFile] = File(...),
+    preprocessing_options: str = Form(None),
+    save: bool = Form(False),
+    timeout: float = Form(None, gt=0, description="Per-image seconds before OCR gives up"),
+    current_user: UserResponse = Depends(get_current_user),
+    db=Depends(get_database)
+):
+    """OCR many images at once, streaming one NDJSON line per image as it finishes"""
+    if len(files) > settings.ocr_batch_max_files:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="File must be an image"
+            detail=f"A batch may contain at most {settings.ocr_batch_max_files} files"
         )
     
-    # Read file contents
-    image_bytes = await file.read()
+    # Either one options object for every file or a list with one entry per file
+    options = _parse_preprocessing_options(preprocessing_options)
+    if isinstance(options, list):
+        if len(options) != len(files):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="preprocessing_options must have one entry per file"
+            )
+        per_file_options = options
+    else:
+        per_file_options = [options] * len(files)
     
-    # Parse preprocessing options
-    options = None
-    if preprocessing_options:
+    # Charged for every image up front; a large batch leaves the user's
+    # bucket in debt rather than being refused outright
+    await ocr_scheduler.admit(current_user.id, cost=len(files))
+    
+    user_id = ObjectId(current_user.id)
+    semaphore = asyncio.Semaphore(settings.ocr_batch_concurrency)
+    
+    async def process(index: int, file: UploadFile, file_options: Optional[dict]) -> dict:
+        async with semaphore:
+            item = {"type": "result", "index": index, "filename": file.filename}
+            try:
+                with await ingest_upload(file) as upload:
+                    result = await ocr_scheduler.run(
+                        current_user.id,
+                        OCRService.extract_text_from_image(
+                            upload.source, file_options, upload.sha256, timeout, user_id=current_user.id
+                        )
+                    )
+                    if settings.image_storage_enabled:
+                        result["image_id"] = await ImageStore.store(db, upload)
+            except HTTPException as e:
+                item.update(status="error", status_code=e.status_code, detail=e.detail)
+            except Exception:
+                # One file failing (a MongoDB error storing it, say) must not
+                # end the stream before the other files' lines
+                logger.exception("Batch item %d (%s) failed", index, file.filename)
+                item.update(status="error", status_code=500, detail="Internal error processing this file")
+            else:
+                item.update(status="ok", result=OCRResponse(**result).model_dump())
+            return item
+    
+    async def save_results(ok_items: List[dict]) -> List[str]:
+        """Save the recognized texts as documents, in file order; returns their ids"""
+        if not ok_items:
+            return []
+        now = datetime.utcnow()
+        docs = []
+        for item in ok_items:
+            doc = {
+                "user_id": user_id,
+                "original_text": item["result"]["extracted_text"],
+                "corrected_text": None,
+                "created_at": now
+            }
+            if item["result"].get("image_id"):
+                doc["image_id"] = item["result"]["image_id"]
+            docs.append(doc)
+        image_refs = Counter(doc["image_id"] for doc in docs if "image_id" in doc)
+        for image_id, count in image_refs.items():
+            await ImageStore.link(db, image_id, count)
+        result = await db.documents.insert_many(docs)
+        await DocumentStats.apply(db, user_id, DocumentStats.combine(map(DocumentStats.delta, docs)))
+        return [str(i) for i in result.inserted_ids]
+    
+    async def stream_results():
+        tasks = [
+            asyncio.create_task(process(index, file, file_options))
+            for index, (file, file_options) in enumerate(zip(files, per_file_options))
+        ]
+        completed = []
         try:
-            options = json.loads(preprocessing_options)
-        except json.JSONDecodeError:
+            for next_done in asyncio.as_completed(tasks):
+                item = await next_done
+                completed.append(item)
+                yield json.dumps(item) + "\n"
+            
+            if save:
+                ok_items = sorted((i for i in completed if i["status"] == "ok"), key=lambda i: i["index"])
+                document_ids = []
+                summary_error = None
+                try:
+                    document_ids = await save_results(ok_items)
+                except Exception:
+                    logger.exception("Saving batch results failed")
+                    summary_error = "Saving the documents failed"
+                summary = {
+                    "type": "summary",
+                    "saved": [
+                        {"index": item["index"], "document_id": document_id}
+                        for item, document_id in zip(ok_items, document_ids)
+                    ]
+                }
+                if summary_error:
+                    summary["error"] = summary_error
+                yield json.dumps(summary) + "\n"
+        finally:
+            # Client went away mid-stream: stop queued pages from starting
+            for task in tasks:
+                task.cancel()
+    
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+
+@router.post("/upload-document", response_model=DocumentOCRResponse)
+@body_limit(lambda: settings.max_document_upload_bytes)
+async def upload_and_process_document(
+    request: Request,
+    file: UploadFile = File(...),
+    preprocessing_options: str = Form(None),
+    timeout: float = Form(None, gt=0, description="Seconds for the whole document before remaining pages time out"),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """OCR every page of a multi-page TIFF or a PDF"""
+    options = _parse_preprocessing_options(preprocessing_options)
+    await ocr_scheduler.admit(current_user.id)
+    
+    # Workers open the file themselves and decode one page each, so the
+    # upload is always spooled to disk instead of being held in memory
+    with await ingest_upload(
+        file,
+        allowed_formats=IMAGE_FORMATS + ("pdf",),
+        max_bytes=settings.max_document_upload_bytes,
+        spool_bytes=0
+    ) as upload:
+        result = await _cancel_on_disconnect(
+            request,
+            ocr_scheduler.run(
+                current_user.id,
+                OCRService.extract_text_from_document(upload.path, options, timeout)
+            )
+        )
+    
+    return DocumentOCRResponse(**result)
+
+
+@router.get("/previews/{preview_id}")
+async def get_preview(
+    preview_id: str,
+    request: Request,
+    width: int = Query(None, ge=16, description="Width in pixels; defaults to the stored size"),
+    format: str = Query(None, pattern="^(webp|jpeg|jpg)$"),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Processed-image preview referenced by OCRResponse.processed_preview
+
+    Only for the users whose OCR produced it, and only from the API process
+    that ran it: previews are kept in memory, so with several workers
+    another process answers 404.
+    """
+    if not preview_store.allowed(preview_id, current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Preview not found"
+        )
+    fmt = preview_format(format)
+    width = min(width or settings.preview_max_dimension, settings.preview_max_dimension)
+    etag = f'"{preview_id}-{width}-{fmt}"'
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=86400, immutable"}
+    
+    if request.headers.get("if-none-match") == etag and preview_id in preview_store:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    data = preview_store.get_cached(preview_id, width, fmt)
+    if data is None:
+        master = preview_store.get_master(preview_id)
+        if master is None:
             raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid preprocessing options format"
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Preview not found"
             )
+        data = await asyncio.to_thread(PreviewStore.render, master, width, fmt)
+        preview_store.put_rendition(preview_id, width, fmt, data)
     
-    # Process image with OCR
-    result = await OCRService.extract_text_from_image(image_bytes, options)
+    return Response(content=data, media_type=MEDIA_TYPES[fmt], headers=headers)
+
+
+@router.post("/jobs", response_model=OCRJobResponse, status_code=status.HTTP_202_ACCEPTED)
+@body_limit(lambda: min(settings.max_upload_bytes, MAX_JOB_IMAGE_BYTES))
+async def submit_ocr_job(
+    file: UploadFile = File(...),
+    preprocessing_options: str = Form(None),
+    current_user: UserResponse = Depends(get_current_user),
+    db=Depends(get_database)
+):
+    options = _parse_preprocessing_options(preprocessing_options)
+    await ocr_scheduler.admit(current_user.id)
     
-    return OCRResponse(**result)
+    # The job document carries the image, so it must fit in a BSON document
+    max_bytes = min(settings.max_upload_bytes, MAX_JOB_IMAGE_BYTES)
+    with await ingest_upload(file, max_bytes=max_bytes) as upload:
+        image_bytes = upload.read_bytes()
+    
+    job = await OCRJobQueue.submit(db, ObjectId(current_user.id), image_bytes, options)
+    return OCRJobResponse(**job)
+
+
+@router.get("/jobs/{job_id}", response_model=OCRJobResponse)
+async def get_ocr_job(
+    job_id: str,
+    wait: float = Query(0, ge=0, description="Seconds to long-poll for the job to finish"),
+    current_user: UserResponse = Depends(get_current_user),
+    db=Depends(get_database)
+):
+    if not ObjectId.is_valid(job_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid job ID"
+        )
+    
+    wait = min(wait, settings.ocr_job_max_wait_seconds)
+    job = await OCRJobQueue.get(db, ObjectId(job_id), ObjectId(current_user.id), wait)
+    
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    
+    return OCRJobResponse(**job)
+
+
+@router.get("/search", response_model=DocumentSearchResponse)
+async def search_documents(
+    q: str = Query(..., min_length=1, max_length=500, description='Words, "quoted phrases" and -excluded words'),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    current_user: UserResponse = Depends(get_current_user),
+    db=Depends(get_database)
+):
+    """Search the user's documents by content, best matches first"""
+    if offset > settings.documents_search_max_offset:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"offset may be at most {settings.documents_search_max_offset}; refine the query instead"
+        )
+    
+    # The text index is prefixed with user_id, so only this user's entries are scanned
+    docs = await db.documents.find(
+        {"user_id": ObjectId(current_user.id), "$text": {"$search": q}},
+        {
+            "score": {"$meta": "textScore"},
+            "original_text": 1,
+            "corrected_text": 1,
+            "created_at": 1,
+        }
+    ).sort([("score", {"$meta": "textScore"}), ("_id", -1)]).skip(offset).limit(limit + 1).to_list(length=limit + 1)
+    
+    terms = search_terms(q)
+    return FastJSONResponse({
+        "query": q,
+        "results": [search_hit(doc, terms, settings.documents_snippet_length) for doc in docs[:limit]],
+        "next_offset": offset + limit if len(docs) > limit else None,
+    })
+
+
+@router.get("/stats", response_model=DocumentStatsResponse)
+async def get_document_stats(
+    current_user: UserResponse = Depends(get_current_user),
+    db=Depends(get_database)
+):
+    """Document count, characters and correction rate, from the user's counters record"""
+    return await DocumentStats.get(db, ObjectId(current_user.id))
+
+
+@router.get("/export")
+async def export_documents(
+    format: str = Query("ndjson", pattern="^(ndjson|csv|zip)$"),
+    current_user: UserResponse = Depends(get_current_user),
+    db=Depends(get_database)
+):
+    """Download all of the user's documents, oldest first, streamed from the cursor"""
+    cursor = db.documents.find({"user_id": ObjectId(current_user.id)}).sort(
+        [("created_at", 1), ("_id", 1)]
+    ).batch_size(settings.documents_export_batch_size)
+    
+    return StreamingResponse(
+        stream_export(cursor, format),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{export_filename(format)}"'}
+    )
+
+
+@router.post("/import", response_model=DocumentImportResponse)
+async def import_documents(
+    file: UploadFile = File(...),
+    format: str = Query(None, pattern="^(ndjson|csv|zip)$", description="Defaults to the file extension"),
+    current_user: UserResponse = Depends(get_current_user),
+    db=Depends(get_database)
+):
+    """Add documents from an export file (NDJSON, CSV or ZIP) as new documents of this user"""
+    reader = ImportReader(file.file, import_format(format, file.filename))
+    user_id = ObjectId(current_user.id)
+    imported = 0
+    
+    # Parse a batch off the event loop, insert it, repeat: only one batch
+    # is in memory however large the file is
+    while True:
+        batch = await asyncio.to_thread(reader.next_batch, settings.documents_import_batch_size)
+        if not batch:
+            break
+        now = datetime.utcnow()
+        for doc in batch:
+            doc["user_id"] = user_id
+            doc["created_at"] = doc["created_at"] or now
+        failed_indexes = set()
+        try:
+            await db.documents.insert_many(batch, ordered=False)
+        except BulkWriteError as e:
+            # The rest of the batch was written; report only what wasn't
+            for error in e.details.get("writeErrors", []):
+                failed_indexes.add(error["index"])
+                reader.error(reader.batch_items[error["index"]], error.get("errmsg", "Write failed"))
+        inserted = [doc for index, doc in enumerate(batch) if index not in failed_indexes]
+        await DocumentStats.apply(db, user_id, DocumentStats.combine(map(DocumentStats.delta, inserted)))
+        imported += len(inserted)
+    
+    return DocumentImportResponse(imported=imported, failed=reader.failed, errors=reader.errors)
+
+
+@router.post("/bulk", response_model=DocumentBulkResponse)
+async def bulk_documents(
+    bulk: DocumentBulkRequest,
+    current_user: UserResponse = Depends(get_current_user),
+    db=Depends(get_database)
+):
+    """Create, update and delete many documents in one unordered bulk write
+
+    Operations may run in any order, so each document can be the target
+    of one operation per request; later ones for it are rejected as invalid.
+    """
+    if len(bulk.operations) > settings.documents_bulk_max_operations:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.documents_bulk_max_operations} operations per request"
+        )
+    
+    user_id = ObjectId(current_user.id)
+    results = [DocumentBulkItemResult(index=i, op=item.op, status="ok", id=item.id) for i, item in enumerate(bulk.operations)]
+    
+    # Per-item not_found needs to know up front which targets the user owns;
+    # one lookup for all of them instead of one per document
+    target_ids = {item.id for item in bulk.operations if item.op != "create" and item.id and ObjectId.is_valid(item.id)}
+    # The current texts are kept to work out the change to the user's stats
+    owned = {}
+    if target_ids:
+        async for doc in db.documents.find(
+            {"_id": {"$in": [ObjectId(i) for i in target_ids]}, "user_id": user_id},
+            {"_id": 1, "image_id": 1, "original_text": 1, "corrected_text": 1}
+        ):
+            owned[str(doc["_id"])] = doc
+    
+    requests, request_items, stats_changes = [], [], []
+    targeted = set()
+    now = datetime.utcnow()
+    for result, item in zip(results, bulk.operations):
+        if item.op == "create":
+            if item.original_text is None:
+                result.status, result.detail = "invalid", "original_text is required"
+                continue
+            document_id = ObjectId()
+            result.id = str(document_id)
+            document_doc = {
+                "_id": document_id,
+                "user_id": user_id,
+                "original_text": item.original_text,
+                "corrected_text": item.corrected_text,
+                "created_at": now
+            }
+            requests.append(InsertOne(document_doc))
+            stats_changes.append(DocumentStats.delta(document_doc))
+        elif not item.id or not ObjectId.is_valid(item.id):
+            result.status, result.detail = "invalid", "Invalid document ID"
+            continue
+        elif item.id not in owned:
+            result.status, result.detail = "not_found", "Document not found"
+            continue
+        elif item.id in targeted:
+            # The stats and image refs are worked out from the state before
+            # the request, which a second operation would count twice
+            result.status, result.detail = "invalid", "Document already has an operation in this request"
+            continue
+        elif item.op == "update":
+            if item.corrected_text is None:
+                result.status, result.detail = "invalid", "corrected_text is required"
+                continue
+            # user_id stays in every filter so ownership holds even if the
+            # document changed hands since the lookup above
+            requests.append(UpdateOne(
+                {"_id": ObjectId(item.id), "user_id": user_id},
+                {"$set": {"corrected_text": item.corrected_text}}
+            ))
+            before = owned[item.id]
+            stats_changes.append(DocumentStats.change(before, {**before, "corrected_text": item.corrected_text}))
+        else:
+            requests.append(DeleteOne({"_id": ObjectId(item.id), "user_id": user_id}))
+            stats_changes.append(DocumentStats.delta(owned[item.id], -1))
+        if item.op != "create":
+            targeted.add(item.id)
+        request_items.append(result)
+    
+    if requests:
+        try:
+            await db.documents.bulk_write(requests, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                failed = request_items[error["index"]]
+                failed.status, failed.detail = "error", error.get("errmsg", "Write failed")
+    
+    # Only operations that were written count towards the stats
+    await DocumentStats.apply(db, user_id, DocumentStats.combine(
+        change for result, change in zip(request_items, stats_changes) if result.status == "ok"
+    ))
+    
+    # Release the stored images of deleted documents
+    image_refs = Counter(
+        owned[result.id].get("image_id") for result in request_items
+        if result.op == "delete" and result.status == "ok" and owned[result.id].get("image_id")
+    )
+    for image_id, count in image_refs.items():
+        await ImageStore.unlink(db, image_id, count)
+    
+    counts = {"create": 0, "update": 0, "delete": 0}
+    for result in results:
+        if result.status == "ok":
+            counts[result.op] += 1
+    return DocumentBulkResponse(
+        created=counts["create"],
+        updated=counts["update"],
+        deleted=counts["delete"],
+        failed=len(results) - sum(counts.values()),
+        results=results
+    )
 
 
 @router.post("/", response_model=DocumentResponse)
@@ -57,23 +620,58 @@ async def create_document(
         "corrected_text": document_data.corrected_text,
         "created_at": datetime.utcnow()
     }
+    if document_data.image_id is not None:
+        if not await ImageStore.link(db, document_data.image_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Stored image not found; upload the image again"
+            )
+        document_doc["image_id"] = document_data.image_id
     
-    result = await db.documents.insert_one(document_doc)
+    try:
+        result = await db.documents.insert_one(document_doc)
+    except Exception:
+        if document_data.image_id is not None:
+            await ImageStore.unlink(db, document_data.image_id)
+        raise
     document_doc["_id"] = result.inserted_id
+    await DocumentStats.apply(db, document_doc["user_id"], DocumentStats.delta(document_doc))
     
     return DocumentResponse(**document_doc)
 
 
-@router.get("/", response_model=List[DocumentResponse])
+@router.get("/", response_model=List[DocumentSummary])
 async def get_user_documents(
+    limit: int = Query(None, ge=1, description="Page size; defaults to DOCUMENTS_PAGE_SIZE"),
+    cursor: str = Query(None, description="X-Next-Cursor from the previous page"),
+    view: str = Query("full", pattern="^(full|summary)$"),
     current_user: UserResponse = Depends(get_current_user),
     db=Depends(get_database)
 ):
-    documents = []
-    async for doc in db.documents.find({"user_id": ObjectId(current_user.id)}).sort("created_at", -1):
-        documents.append(DocumentResponse(**doc))
+    """Newest documents first, one page at a time
+
+    When there are more, the X-Next-Cursor header holds the cursor for the
+    next page. view=summary returns only a snippet of each text.
+    """
+    limit = min(limit or settings.documents_page_size, settings.documents_max_page_size)
+    query = {"user_id": ObjectId(current_user.id)}
+    if cursor:
+        query.update(_decode_cursor(cursor))
+    projection = _summary_projection(settings.documents_snippet_length) if view == "summary" else None
+    
+    # One extra row tells us whether there is a next page
+    docs = await db.documents.find(query, projection).sort(
+        [("created_at", -1), ("_id", -1)]
+    ).limit(limit + 1).to_list(length=limit + 1)
+    
+    headers = {}
+    if len(docs) > limit:
+        docs = docs[:limit]
+        headers["X-Next-Cursor"] = _encode_cursor(docs[-1])
     
-    return documents
+    # Rows come straight from our collection, so they are encoded as-is
+    # rather than validated into DocumentSummary models first
+    return FastJSONResponse([document_row(doc, summary=True) for doc in docs], headers=headers)
 
 
 @router.get("/{document_id}", response_model=DocumentResponse)
@@ -99,7 +697,7 @@ async def get_document(
             detail="Document not found"
         )
     
-    return DocumentResponse(**document)
+    return FastJSONResponse(document_row(document))
 
 
 @router.put("/{document_id}", response_model=DocumentResponse)
@@ -115,26 +713,22 @@ async def update_document(
             detail="Invalid document ID"
         )
     
-    # Check if document exists and belongs to user
-    existing_doc = await db.documents.find_one({
-        "_id": ObjectId(document_id),
-        "user_id": ObjectId(current_user.id)
-    })
+    # Update only if the document belongs to the user; the old version gives
+    # the change to the stats, and the new one is the old plus the $set
+    previous_doc = await db.documents.find_one_and_update(
+        {"_id": ObjectId(document_id), "user_id": ObjectId(current_user.id)},
+        {"$set": {"corrected_text": document_update.corrected_text}},
+        return_document=ReturnDocument.BEFORE
+    )
     
-    if not existing_doc:
+    if not previous_doc:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Document not found"
         )
     
-    # Update document
-    await db.documents.update_one(
-        {"_id": ObjectId(document_id)},
-        {"$set": {"corrected_text": document_update.corrected_text}}
-    )
-    
-    # Return updated document
-    updated_doc = await db.documents.find_one({"_id": ObjectId(document_id)})
+    updated_doc = {**previous_doc, "corrected_text": document_update.corrected_text}
+    await DocumentStats.apply(db, previous_doc["user_id"], DocumentStats.change(previous_doc, updated_doc))
     return DocumentResponse(**updated_doc)
 
 
@@ -150,19 +744,123 @@ async def delete_document(
             detail="Invalid document ID"
         )
     
-    # Check if document exists and belongs to user
-    existing_doc = await db.documents.find_one({
-        "_id": ObjectId(document_id),
-        "user_id": ObjectId(current_user.id)
-    })
+    # Delete only if the document belongs to the user
+    deleted = await db.documents.find_one_and_delete(
+        {"_id": ObjectId(document_id), "user_id": ObjectId(current_user.id)},
+        projection={"image_id": 1, "original_text": 1, "corrected_text": 1}
+    )
     
-    if not existing_doc:
+    if deleted is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Document not found"
         )
     
-    # Delete document
-    await db.documents.delete_one({"_id": ObjectId(document_id)})
+    await DocumentStats.apply(db, ObjectId(current_user.id), DocumentStats.delta(deleted, -1))
+    if deleted.get("image_id"):
+        await ImageStore.unlink(db, deleted["image_id"])
     
     return {"message": "Document deleted successfully"}
+
+
+async def _stored_image(document_id: str, current_user: UserResponse, db) -> tuple:
+    """The user's document and the record of its stored source image"""
+    if not ObjectId.is_valid(document_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid document ID"
+        )
+    
+    document = await db.documents.find_one(
+        {"_id": ObjectId(document_id), "user_id": ObjectId(current_user.id)},
+        {"image_id": 1}
+    )
+    if not document:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document not found"
+        )
+    
+    record = await ImageStore.get(db, document["image_id"]) if document.get("image_id") else None
+    if record is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No stored image for this document"
+        )
+    return document, record
+
+
+@router.get("/{document_id}/image")
+async def get_document_image(
+    document_id: str,
+    request: Request,
+    current_user: UserResponse = Depends(get_current_user),
+    db=Depends(get_database)
+):
+    """The original upload a document was recognized from, streamed; supports Range"""
+    _, record = await _stored_image(document_id, current_user, db)
+    
+    size = record["length"]
+    etag = f'"{record["_id"]}"'
+    headers = {"Accept-Ranges": "bytes", "ETag": etag, "Cache-Control": "private, max-age=86400, immutable"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    byte_range = parse_range(request.headers.get("range"), size)
+    start, end = byte_range or (0, size - 1)
+    headers["Content-Length"] = str(end - start + 1)
+    if byte_range:
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    
+    return StreamingResponse(
+        ImageStore.stream(db, record, start, end),
+        status_code=status.HTTP_206_PARTIAL_CONTENT if byte_range else status.HTTP_200_OK,
+        media_type=IMAGE_MEDIA_TYPES.get(record["format"], "application/octet-stream"),
+        headers=headers
+    )
+
+
+@router.post("/{document_id}/reocr", response_model=OCRResponse)
+async def reprocess_document(
+    document_id: str,
+    reocr: ReOCRRequest,
+    request: Request,
+    response: Response,
+    current_user: UserResponse = Depends(get_current_user),
+    db=Depends(get_database)
+):
+    """OCR a document's stored image again, e.g. with other options or a newer engine
+
+    The OCR cache is skipped so an engine change takes effect. With save,
+    the new text replaces original_text; corrected_text is left as it is.
+    """
+    document, record = await _stored_image(document_id, current_user, db)
+    await ocr_scheduler.admit(current_user.id)
+    
+    image = await ImageStore.read(db, record)
+    result = await _cancel_on_disconnect(
+        request,
+        ocr_scheduler.run(
+            current_user.id,
+            OCRService.extract_text_from_image(
+                image, reocr.preprocessing_options, record["_id"], reocr.timeout,
+                use_cache=False, user_id=current_user.id
+            )
+        )
+    )
+    result["image_id"] = record["_id"]
+    
+    if reocr.save:
+        previous_doc = await db.documents.find_one_and_update(
+            {"_id": document["_id"], "user_id": ObjectId(current_user.id)},
+            {"$set": {"original_text": result["extracted_text"]}},
+            projection={"original_text": 1, "corrected_text": 1},
+            return_document=ReturnDocument.BEFORE
+        )
+        if previous_doc is not None:
+            await DocumentStats.apply(db, ObjectId(current_user.id), DocumentStats.change(
+                previous_doc, {**previous_doc, "original_text": result["extracted_text"]}
+            ))
+    
+    response.headers["Server-Timing"] = server_timing(result["timings"])
+    return OCRResponse(**result)
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from ..database import get_database
 from ..models import UserResponse, UserUpdate
-from ..auth import get_current_user, get_password_hash
+from ..auth import get_current_user, get_password_hash, invalidate_user
 from bson import ObjectId
 
 
@@ -58,6 +58,7 @@ async def update_profile(
         {"_id": ObjectId(current_user.id)},
         {"$set": update_data}
     )
+    invalidate_user(current_user.id)
     
     # Return updated user
     updated_user = await db.users.find_one({"_id": ObjectId(current_user.id)})
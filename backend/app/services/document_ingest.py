@@ -0,0 +1,67 @@
+import math
+from typing import Tuple
+from PIL import Image
+
+try:
+    import pypdfium2
+except ImportError:  # optional: PDF rasterization
+    pypdfium2 = None
+from ..config import settings
+
+
+PDF_MAGIC = b"%PDF-"
+
+
+class UnsupportedDocumentError(Exception):
+    """Raised when a document format can't be read in this install"""
+
+
+def detect_document(path: str) -> Tuple[str, int]:
+    """Return (kind, page_count) for a file on disk without decoding any pages"""
+    with open(path, "rb") as f:
+        header = f.read(len(PDF_MAGIC))
+
+    if header == PDF_MAGIC:
+        if pypdfium2 is None:
+            raise UnsupportedDocumentError("PDF support requires the pypdfium2 package")
+        pdf = pypdfium2.PdfDocument(path)
+        try:
+            return "pdf", len(pdf)
+        finally:
+            pdf.close()
+
+    with Image.open(path) as image:
+        return "image", getattr(image, "n_frames", 1)
+
+
+def pdf_render_scale(width: float, height: float) -> float:
+    """Scale for a page of width x height points: PDF_RENDER_DPI, lowered if
+    that would make a bitmap of more than MAX_IMAGE_PIXELS"""
+    scale = settings.pdf_render_dpi / 72
+    area = width * height
+    limit = settings.max_image_pixels
+    if area > 0 and (width * scale + 1) * (height * scale + 1) > limit:
+        # The page's MediaBox is up to the uploader; never render past the
+        # limit raster uploads are held to. Largest scale with
+        # (width * scale + 1) * (height * scale + 1) <= limit, so rounding
+        # the bitmap up to whole pixels stays inside it too
+        sides = width + height
+        scale = (math.sqrt(sides * sides + 4 * area * (limit - 1)) - sides) / (2 * area)
+    return scale
+
+
+def load_page(path: str, kind: str, page_index: int) -> Image.Image:
+    """Decode a single page, leaving the rest of the file untouched"""
+    if kind == "pdf":
+        pdf = pypdfium2.PdfDocument(path)
+        try:
+            page = pdf[page_index]
+            bitmap = page.render(scale=pdf_render_scale(*page.get_size()))
+            return bitmap.to_pil()
+        finally:
+            pdf.close()
+
+    image = Image.open(path)
+    image.seek(page_index)
+    image.load()
+    return image
@@ -0,0 +1,90 @@
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# Roughly how MongoDB's text index splits words; stemming means a stored
+# word only has to start with the query term's stem to have matched
+_WORD = re.compile(r"\w+", re.UNICODE)
+_PHRASE = re.compile(r'"([^"]+)"')
+MIN_STEM = 4
+
+
+def search_terms(query: str) -> List[str]:
+    """Words and phrases to highlight for a $text query, minus negated words"""
+    phrases = [p.strip().lower() for p in _PHRASE.findall(query) if p.strip()]
+    rest = _PHRASE.sub(" ", query)
+    words = [
+        word.lower() for token in rest.split() if not token.startswith("-")
+        for word in _WORD.findall(token)
+    ]
+    return phrases + [w for w in dict.fromkeys(words) if w not in phrases]
+
+
+def _term_pattern(terms: List[str]) -> Optional[re.Pattern]:
+    parts = []
+    for term in terms:
+        if " " in term:
+            parts.append(re.escape(term))
+        else:
+            # Match the stem and the rest of the word: "running" finds "runs"
+            stem = term[:max(MIN_STEM, len(term) - 3)]
+            parts.append(re.escape(stem) + r"\w*")
+    if not parts:
+        return None
+    return re.compile(r"\b(?:" + "|".join(parts) + r")", re.IGNORECASE | re.UNICODE)
+
+
+def build_snippet(text: str, terms: List[str], width: int = 200) -> Tuple[str, List[Tuple[int, int]]]:
+    """Window of about width characters around the densest run of matches
+
+    Returns the snippet and (start, end) offsets of each highlighted match
+    within it, leaving any markup to the client.
+    """
+    pattern = _term_pattern(terms)
+    matches = list(pattern.finditer(text))[:200] if pattern else []
+    if not matches:
+        snippet = text[:width]
+        return (snippet + "…" if len(text) > width else snippet), []
+
+    # Start from the match whose window covers the most other matches
+    best_start, best_count = matches[0].start(), 0
+    for i, match in enumerate(matches):
+        count = sum(1 for m in matches[i:] if m.end() <= match.start() + width)
+        if count > best_count:
+            best_start, best_count = match.start(), count
+
+    start = max(0, best_start - width // 4)
+    # Don't cut the first word in half
+    if start > 0:
+        space = text.rfind(" ", 0, start)
+        start = space + 1 if space >= 0 and start - space < 20 else start
+    end = min(len(text), start + width)
+
+    prefix = "…" if start > 0 else ""
+    snippet = prefix + text[start:end] + ("…" if end < len(text) else "")
+    highlights = [
+        (m.start() - start + len(prefix), m.end() - start + len(prefix))
+        for m in matches if m.start() >= start and m.end() <= end
+    ]
+    return snippet, highlights
+
+
+def search_hit(doc: Dict[str, Any], terms: List[str], width: int) -> Dict[str, Any]:
+    """Search result for a document returned by a $text query"""
+    # Prefer the corrected text when it is what matched
+    field = "original_text"
+    corrected = doc.get("corrected_text")
+    if corrected:
+        pattern = _term_pattern(terms)
+        if pattern is None or pattern.search(corrected) or not pattern.search(doc.get("original_text") or ""):
+            field = "corrected_text"
+
+    snippet, highlights = build_snippet(doc.get(field) or "", terms, width)
+    return {
+        "_id": doc["_id"],
+        "created_at": doc["created_at"],
+        "score": doc.get("score", 0.0),
+        "field": field,
+        "snippet": snippet,
+        "highlights": highlights,
+    }
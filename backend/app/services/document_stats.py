@@ -0,0 +1,102 @@
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional
+from bson import ObjectId
+
+
+COUNTERS = ("documents", "corrected", "original_characters", "corrected_characters")
+
+
+def _length_expr(field: str) -> dict:
+    return {"$strLenCP": {"$ifNull": [f"${field}", ""]}}
+
+
+class DocumentStats:
+    """Per-user counters in document_stats, kept current by every document write
+
+    One record per user (_id = user_id) holding the COUNTERS. Handlers apply
+    the change each write makes with a single $inc, so reading the stats is
+    one _id lookup. The document write and the $inc are separate operations:
+    if something fails in between, rebuild() recomputes the counters from
+    the documents themselves.
+    """
+
+    @staticmethod
+    def delta(doc: Optional[Dict[str, Any]], sign: int = 1) -> Dict[str, int]:
+        """What one document contributes to the counters (negated with sign=-1)"""
+        if doc is None:
+            return {}
+        original = doc.get("original_text") or ""
+        corrected = doc.get("corrected_text") or ""
+        return {
+            "documents": sign,
+            "corrected": sign if corrected else 0,
+            "original_characters": sign * len(original),
+            "corrected_characters": sign * len(corrected),
+        }
+
+    @staticmethod
+    def change(before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]) -> Dict[str, int]:
+        return DocumentStats.combine([DocumentStats.delta(before, -1), DocumentStats.delta(after)])
+
+    @staticmethod
+    def combine(deltas: Iterable[Dict[str, int]]) -> Dict[str, int]:
+        total: Dict[str, int] = {}
+        for delta in deltas:
+            for key, value in delta.items():
+                total[key] = total.get(key, 0) + value
+        return total
+
+    @staticmethod
+    async def apply(db, user_id: ObjectId, delta: Dict[str, int]):
+        """$inc the user's counters; creates the record on the first write"""
+        delta = {key: value for key, value in delta.items() if value}
+        if not delta:
+            return
+        await db.document_stats.update_one(
+            {"_id": user_id},
+            {"$inc": delta, "$set": {"updated_at": datetime.utcnow()}},
+            upsert=True
+        )
+
+    @staticmethod
+    async def get(db, user_id: ObjectId) -> Dict[str, Any]:
+        record = await db.document_stats.find_one({"_id": user_id}) or {}
+        stats = {key: record.get(key, 0) for key in COUNTERS}
+        stats["correction_rate"] = stats["corrected"] / stats["documents"] if stats["documents"] else 0.0
+        stats["updated_at"] = record.get("updated_at")
+        return stats
+
+    @staticmethod
+    async def rebuild(db, user_id: Optional[ObjectId] = None) -> int:
+        """Recompute the counters from the documents, for one user or everyone
+
+        Writes made while this runs can be counted twice or not at all, so
+        run it when the affected users are quiet. Returns the number of users
+        whose counters were written.
+        """
+        match = {"user_id": user_id} if user_id is not None else {}
+        pipeline = [
+            {"$match": match},
+            {"$group": {
+                "_id": "$user_id",
+                "documents": {"$sum": 1},
+                "corrected": {"$sum": {"$cond": [{"$gt": [_length_expr("corrected_text"), 0]}, 1, 0]}},
+                "original_characters": {"$sum": _length_expr("original_text")},
+                "corrected_characters": {"$sum": _length_expr("corrected_text")},
+            }},
+        ]
+        started = datetime.utcnow()
+        written = 0
+        async for row in db.documents.aggregate(pipeline):
+            await db.document_stats.replace_one(
+                {"_id": row["_id"]}, {**row, "updated_at": datetime.utcnow()}, upsert=True
+            )
+            written += 1
+
+        # Users without documents get no row above; drop counters they still
+        # have unless a write has touched them since the rebuild started
+        stale = {"updated_at": {"$lt": started}}
+        if user_id is not None:
+            stale["_id"] = user_id
+        await db.document_stats.delete_many(stale)
+        return written
@@ -0,0 +1,254 @@
+import csv
+import io
+import json
+import os
+import zipfile
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, BinaryIO, Dict, Iterator, List, Optional, Tuple
+from fastapi import HTTPException, status
+from ..config import settings
+
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+    "zip": "application/zip",
+}
+CSV_FIELDS = ["id", "user_id", "created_at", "original_text", "corrected_text"]
+
+# Flush the response in chunks of about this size rather than per document
+CHUNK_BYTES = 64 * 1024
+
+ZIP_TIMESTAMP = "%Y%m%dT%H%M%S"
+
+# Largest text accepted from one ZIP entry (a document has to fit in 16MB BSON)
+MAX_ZIP_ENTRY_BYTES = 8 * 1024 * 1024
+
+# Largest CSV field; the csv module's default of 128K is smaller than texts
+# the export writes
+MAX_CSV_FIELD_CHARS = 16 * 1024 * 1024
+
+
+def export_row(doc: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": str(doc["_id"]),
+        "user_id": str(doc["user_id"]),
+        "created_at": doc["created_at"].isoformat(),
+        "original_text": doc.get("original_text"),
+        "corrected_text": doc.get("corrected_text"),
+    }
+
+
+def _zip_stem(doc: Dict[str, Any], per_user: bool) -> str:
+    stem = f'{doc["created_at"].strftime(ZIP_TIMESTAMP)}_{doc["_id"]}'
+    return f'{doc["user_id"]}/{stem}' if per_user else stem
+
+
+class _ChunkBuffer(io.RawIOBase):
+    """Write-only, unseekable sink that zipfile streams into; drained per chunk"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self.size = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        self.size = 0
+        return data
+
+
+async def stream_export(cursor, fmt: str, per_user: bool = False) -> AsyncIterator[bytes]:
+    """Encode documents from a Motor cursor as they arrive
+
+    Only one cursor batch and one output chunk are held in memory. With
+    per_user, ZIP entries are grouped in a folder per user_id.
+    """
+    if fmt == "zip":
+        buffer = _ChunkBuffer()
+        # zipfile falls back to data descriptors on an unseekable stream, so
+        # entries can be sent before the archive is complete
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+            async for doc in cursor:
+                stem = _zip_stem(doc, per_user)
+                archive.writestr(f"{stem}.txt", doc.get("original_text") or "")
+                if doc.get("corrected_text") is not None:
+                    archive.writestr(f"{stem}.corrected.txt", doc["corrected_text"])
+                if buffer.size >= CHUNK_BYTES:
+                    yield buffer.drain()
+        yield buffer.drain()
+        return
+
+    text = io.StringIO()
+    writer = None
+    if fmt == "csv":
+        writer = csv.DictWriter(text, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+
+    async for doc in cursor:
+        row = export_row(doc)
+        if writer is not None:
+            writer.writerow(row)
+        else:
+            text.write(json.dumps(row, ensure_ascii=False) + "\n")
+        if text.tell() >= CHUNK_BYTES:
+            yield text.getvalue().encode()
+            text.seek(0)
+            text.truncate()
+    yield text.getvalue().encode()
+
+
+def export_filename(fmt: str, prefix: str = "documents") -> str:
+    return f'{prefix}-{datetime.utcnow().strftime(ZIP_TIMESTAMP)}.{fmt}'
+
+
+# Import
+
+def import_format(fmt: Optional[str], filename: Optional[str]) -> str:
+    """Format from the query parameter, else from the file extension"""
+    if not fmt and filename:
+        fmt = os.path.splitext(filename)[1].lstrip(".").lower()
+        fmt = {"jsonl": "ndjson", "json": "ndjson"}.get(fmt, fmt)
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Import format must be one of: {', '.join(EXPORT_FORMATS)}"
+        )
+    return fmt
+
+
+def _parse_created_at(value: Any) -> Optional[datetime]:
+    if value in (None, ""):
+        return None
+    created_at = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    # Stored like datetime.utcnow(): naive UTC
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+    return created_at
+
+
+def _import_doc(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Fields we keep from an imported row; ids and owners are always reassigned"""
+    original_text = row.get("original_text")
+    if not isinstance(original_text, str) or original_text == "":
+        raise ValueError("original_text is required")
+    corrected_text = row.get("corrected_text")
+    if corrected_text == "":
+        corrected_text = None
+    if corrected_text is not None and not isinstance(corrected_text, str):
+        raise ValueError("corrected_text must be a string")
+    return {
+        "original_text": original_text,
+        "corrected_text": corrected_text,
+        "created_at": _parse_created_at(row.get("created_at")),
+    }
+
+
+# Readers yield (line or entry number, row); a row that can't be parsed is
+# yielded as the exception so the rest of the file still imports
+
+def _rows_ndjson(file: BinaryIO) -> Iterator[Tuple[int, Any]]:
+    for line_no, line in enumerate(io.TextIOWrapper(file, encoding="utf-8"), start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_no, ValueError(f"Invalid JSON: {e.msg}")
+
+
+def _rows_csv(file: BinaryIO) -> Iterator[Tuple[int, Any]]:
+    if csv.field_size_limit() < MAX_CSV_FIELD_CHARS:
+        csv.field_size_limit(MAX_CSV_FIELD_CHARS)
+    reader = csv.DictReader(io.TextIOWrapper(file, encoding="utf-8", newline=""))
+    for row in reader:
+        yield reader.line_num, row
+
+
+def _read_zip_text(archive: zipfile.ZipFile, name: str) -> Optional[str]:
+    info = archive.NameToInfo.get(name)
+    if info is None:
+        return None
+    if info.file_size > MAX_ZIP_ENTRY_BYTES:
+        raise ValueError(f"{name} is larger than {MAX_ZIP_ENTRY_BYTES} bytes")
+    return archive.read(info).decode("utf-8")
+
+
+def _rows_zip(file: BinaryIO) -> Iterator[Tuple[int, Any]]:
+    """Entries named like the export: <YYYYmmddTHHMMSS>_<id>.txt plus .corrected.txt"""
+    with zipfile.ZipFile(file) as archive:
+        names = [n for n in archive.namelist() if n.endswith(".txt") and not n.endswith(".corrected.txt")]
+        for number, name in enumerate(names, start=1):
+            stem = name[:-len(".txt")]
+            timestamp = os.path.basename(stem).split("_", 1)[0]
+            try:
+                created_at = datetime.strptime(timestamp, ZIP_TIMESTAMP).isoformat()
+            except ValueError:
+                created_at = None
+            try:
+                row = {
+                    "original_text": _read_zip_text(archive, name),
+                    "corrected_text": _read_zip_text(archive, f"{stem}.corrected.txt"),
+                    "created_at": created_at,
+                }
+            except (ValueError, UnicodeDecodeError) as e:
+                row = ValueError(f"{name}: {e}")
+            yield number, row
+
+
+_READERS = {"ndjson": _rows_ndjson, "csv": _rows_csv, "zip": _rows_zip}
+
+
+class ImportReader:
+    """Parses an uploaded export a batch at a time (call next_batch in a thread)
+
+    Rows that don't parse are collected as errors instead of failing the
+    whole import. Input that can't be read any further (bad encoding, a
+    broken ZIP or CSV) ends the import with an error for where it stopped.
+    """
+
+    def __init__(self, file: BinaryIO, fmt: str):
+        self._rows: Optional[Iterator[Tuple[int, Any]]] = _READERS[fmt](file)
+        self._last_item = 0
+        self.errors: List[Dict[str, Any]] = []
+        self.failed = 0
+        # Item number of each document in the last batch, for reporting insert errors
+        self.batch_items: List[int] = []
+
+    def error(self, item: int, detail: str):
+        self.failed += 1
+        if len(self.errors) < settings.documents_import_max_errors:
+            self.errors.append({"item": item, "detail": detail})
+
+    def next_batch(self, size: int) -> List[Dict[str, Any]]:
+        batch = []
+        self.batch_items = []
+        while self._rows is not None and len(batch) < size:
+            try:
+                item, row = next(self._rows)
+            except StopIteration:
+                self._rows = None
+                break
+            except (UnicodeDecodeError, zipfile.BadZipFile, csv.Error, EOFError) as e:
+                self.error(self._last_item + 1, f"Unreadable input, import stopped here: {e}")
+                self._rows = None
+                break
+            self._last_item = item
+            try:
+                if isinstance(row, Exception):
+                    raise row
+                if not isinstance(row, dict):
+                    raise ValueError("each row must be an object")
+                batch.append(_import_doc(row))
+                self.batch_items.append(item)
+            except (ValueError, TypeError) as e:
+                self.error(item, str(e))
+        return batch
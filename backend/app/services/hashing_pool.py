@@ -0,0 +1,68 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from fastapi import HTTPException, status
+from ..config import settings
+
+
+class HashingPool:
+    """Small bounded thread pool for bcrypt, kept apart from the OCR workers
+
+    bcrypt releases the GIL while hashing, so threads run in parallel and
+    the event loop stays free. A login burst queues here (up to
+    PASSWORD_HASH_MAX_QUEUE) and is then refused with 503 instead of piling up.
+    """
+
+    def __init__(self):
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.workers = 0
+        self.max_queue = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def start(self):
+        if self._executor is not None:
+            return
+        self.workers = settings.password_hash_workers
+        self.max_queue = settings.password_hash_max_queue
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "queue_depth": max(0, self.in_flight - self.workers),
+            "max_queue": self.max_queue,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        """Run fn(*args) on a hashing thread, or raise 503 if the queue is full"""
+        if self._executor is None:
+            self.start()
+
+        if self.in_flight >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many sign-ins in progress, please retry shortly",
+                headers={"Retry-After": str(settings.password_hash_retry_after_seconds)}
+            )
+
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, fn, *args)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+
+
+hashing_pool = HashingPool()
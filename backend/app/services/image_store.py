@@ -0,0 +1,167 @@
+import io
+import re
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+from fastapi import HTTPException
+from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+from .upload_ingest import IngestedUpload
+
+
+BUCKET = "images"
+
+IMAGE_MEDIA_TYPES = {
+    "jpeg": "image/jpeg",
+    "png": "image/png",
+    "gif": "image/gif",
+    "tiff": "image/tiff",
+    "bmp": "image/bmp",
+    "webp": "image/webp",
+}
+
+STREAM_CHUNK_BYTES = 256 * 1024
+
+_RANGE = re.compile(r"bytes=(\d*)-(\d*)$")
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Inclusive (start, end) for a single-range Range header, or None for the whole file
+
+    Multiple ranges aren't supported and get the whole file, which RFC 9110
+    allows; a range that starts past the end raises a 416.
+    """
+    if not header:
+        return None
+    match = _RANGE.match(header.strip())
+    if match is None:
+        return None
+    first, last = match.groups()
+    if first == "":
+        if last == "":
+            return None
+        # Suffix range: the last N bytes
+        start, end = max(0, size - int(last)), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    return start, end
+
+
+class ImageStore:
+    """Original uploads in GridFS, stored once per SHA-256 and shared by reference count
+
+    source_images has one record per distinct image, keyed by its digest,
+    with the GridFS file id and refs, the number of documents whose image_id
+    points at it. Identical scans from any user share one stored copy. An
+    image nothing refers to is deleted by the worker's sweep once it has been
+    unused for IMAGE_STORAGE_ORPHAN_GRACE_SECONDS, which leaves time to save
+    a document from a fresh upload.
+
+    The digest is only handed to the user who uploaded the image, so like a
+    preview id it works as a capability.
+    """
+
+    @staticmethod
+    def _bucket(db) -> AsyncIOMotorGridFSBucket:
+        return AsyncIOMotorGridFSBucket(db, bucket_name=BUCKET)
+
+    @staticmethod
+    async def store(db, upload: IngestedUpload) -> str:
+        """Keep an upload unless an identical image is already stored; returns its id"""
+        now = datetime.utcnow()
+        existing = await db.source_images.find_one_and_update(
+            {"_id": upload.sha256}, {"$set": {"last_used_at": now}}, projection={"_id": 1}
+        )
+        if existing is not None:
+            return upload.sha256
+
+        bucket = ImageStore._bucket(db)
+        source = io.BytesIO(upload.data) if upload.data is not None else open(upload.path, "rb")
+        with source:
+            file_id = await bucket.upload_from_stream(
+                upload.sha256, source, metadata={"format": upload.format}
+            )
+
+        result = await db.source_images.update_one(
+            {"_id": upload.sha256},
+            {
+                "$setOnInsert": {
+                    "file_id": file_id,
+                    "format": upload.format,
+                    "length": upload.size,
+                    "refs": 0,
+                    "created_at": now
+                },
+                "$set": {"last_used_at": now}
+            },
+            upsert=True
+        )
+        if result.upserted_id is None:
+            # Another request stored the same image meanwhile; keep theirs
+            await bucket.delete(file_id)
+        return upload.sha256
+
+    @staticmethod
+    async def link(db, image_id: str, count: int = 1) -> bool:
+        """Count count more documents as referring to an image; False if it isn't stored"""
+        result = await db.source_images.update_one(
+            {"_id": image_id},
+            {"$inc": {"refs": count}, "$set": {"last_used_at": datetime.utcnow()}}
+        )
+        return result.matched_count == 1
+
+    @staticmethod
+    async def unlink(db, image_id: str, count: int = 1):
+        await ImageStore.link(db, image_id, -count)
+
+    @staticmethod
+    async def get(db, image_id: str) -> Optional[Dict[str, Any]]:
+        return await db.source_images.find_one({"_id": image_id})
+
+    @staticmethod
+    async def read(db, record: Dict[str, Any]) -> bytes:
+        grid_out = await ImageStore._bucket(db).open_download_stream(record["file_id"])
+        return await grid_out.read()
+
+    @staticmethod
+    async def stream(db, record: Dict[str, Any], start: int, end: int) -> AsyncIterator[bytes]:
+        """Bytes start..end (inclusive), read from GridFS a chunk at a time"""
+        grid_out = await ImageStore._bucket(db).open_download_stream(record["file_id"])
+        grid_out.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await grid_out.read(min(remaining, STREAM_CHUNK_BYTES))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+    @staticmethod
+    async def remove_unused(db, grace_seconds: int) -> int:
+        """Delete images no document has referred to for grace_seconds; returns how many"""
+        cutoff = datetime.utcnow() - timedelta(seconds=grace_seconds)
+        bucket = ImageStore._bucket(db)
+        removed = 0
+        async for record in db.source_images.find(
+            {"refs": {"$lte": 0}, "last_used_at": {"$lt": cutoff}}, {"_id": 1}
+        ):
+            # refs is only a counter; if a document still points here, the
+            # count drifted and is repaired instead of losing the image
+            references = await db.documents.count_documents({"image_id": record["_id"]})
+            if references:
+                await db.source_images.update_one({"_id": record["_id"]}, {"$set": {"refs": references}})
+                continue
+
+            # Conditional, so an image linked since the query above survives
+            deleted = await db.source_images.find_one_and_delete(
+                {"_id": record["_id"], "refs": {"$lte": 0}, "last_used_at": {"$lt": cutoff}}
+            )
+            if deleted is not None:
+                await bucket.delete(deleted["file_id"])
+                removed += 1
+        return removed
@@ -0,0 +1,227 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from pymongo import monitoring
+
+
+# Seconds; wide enough for both a cache hit and a slow tesseract page
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+# Stats keys that only ever grow; everything else is exported as a gauge
+COUNTER_KEYS = {
+    "completed", "failed", "timed_out", "cancelled", "rejected",
+    "hits", "misses", "evictions", "admitted", "throttled",
+}
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            lines.append(f"{self.name}{_labels(self.label_names, key)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts (last is +Inf), sum, count]
+        self._series: Dict[LabelValues, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str):
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((key, (list(s[0]), s[1], s[2])) for key, s in self._series.items())
+        for key, (counts, total, count) in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Metrics in the Prometheus text format, without a client library
+
+    Counters and histograms are recorded as things happen; the components
+    that already keep their own stats (pools, caches, the scheduler) are
+    read at scrape time through collectors.
+    """
+
+    def __init__(self):
+        self._metrics: List[Any] = []
+        self._collectors: List[Tuple[str, Callable[[], Dict[str, Any]]]] = []
+
+    def counter(self, name: str, help: str, labels: Tuple[str, ...] = ()) -> Counter:
+        metric = Counter(name, help, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, help, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def collect(self, prefix: str, stats: Callable[[], Dict[str, Any]]):
+        """Export the numeric values of a stats() dict as prefix_<key>"""
+        self._collectors.append((prefix, stats))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for prefix, stats in self._collectors:
+            for key, value in stats().items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                if key in COUNTER_KEYS:
+                    name = f"{prefix}_{key}_total"
+                    lines += [f"# TYPE {name} counter", f"{name} {_number(value)}"]
+                else:
+                    name = f"{prefix}_{key}"
+                    lines += [f"# TYPE {name} gauge", f"{name} {_number(value)}"]
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+http_request_seconds = metrics.histogram(
+    "http_request_seconds", "HTTP request latency until the response starts", ("method", "route", "status")
+)
+http_request_bytes = metrics.histogram(
+    "http_request_bytes", "HTTP request body size from Content-Length", ("method", "route"), SIZE_BUCKETS
+)
+http_response_bytes = metrics.histogram(
+    "http_response_bytes", "HTTP response body size from Content-Length", ("method", "route"), SIZE_BUCKETS
+)
+ocr_stage_seconds = metrics.histogram(
+    "ocr_stage_seconds", "Time spent in each stage of an OCR request", ("stage",)
+)
+ocr_requests = metrics.counter(
+    "ocr_requests_total", "OCR requests by outcome (ok, cached, timeout, error)", ("outcome",)
+)
+mongodb_command_seconds = metrics.histogram(
+    "mongodb_command_seconds", "MongoDB command latency", ("command", "collection")
+)
+mongodb_command_failures = metrics.counter(
+    "mongodb_command_failures_total", "Failed MongoDB commands", ("command", "collection")
+)
+
+
+class StageTimer:
+    """Accumulates named stage durations, in seconds, for one piece of work"""
+
+    def __init__(self, timings: Optional[Dict[str, float]] = None):
+        self.timings: Dict[str, float] = dict(timings or {})
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def add(self, name: str, seconds: float):
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def record(self):
+        """Report every stage to ocr_stage_seconds"""
+        for name, seconds in self.timings.items():
+            ocr_stage_seconds.observe(seconds, stage=name)
+
+
+def server_timing(timings: Dict[str, float]) -> str:
+    """Server-Timing header value for stage durations given in seconds"""
+    return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items())
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Records the latency of every MongoDB command, per command and collection"""
+
+    def __init__(self):
+        self._collections: Dict[Tuple[Any, int], str] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent):
+        collection = event.command.get(event.command_name)
+        if not isinstance(collection, str):
+            # e.g. getMore carries the cursor id; its collection is a separate field
+            collection = event.command.get("collection", "")
+        self._collections[(event.connection_id, event.request_id)] = collection if isinstance(collection, str) else ""
+
+    def _finished(self, event) -> str:
+        return self._collections.pop((event.connection_id, event.request_id), "")
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent):
+        collection = self._finished(event)
+        mongodb_command_seconds.observe(event.duration_micros / 1e6, command=event.command_name, collection=collection)
+
+    def failed(self, event: monitoring.CommandFailedEvent):
+        collection = self._finished(event)
+        mongodb_command_seconds.observe(event.duration_micros / 1e6, command=event.command_name, collection=collection)
+        mongodb_command_failures.inc(command=event.command_name, collection=collection)
+
+
+mongo_listener = MongoCommandListener()
@@ -0,0 +1,86 @@
+import hashlib
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional, Union
+from pydantic import ValidationError
+from ..config import settings
+from ..database import db
+from ..models import PreprocessingOptions
+from .cache import TTLCache
+
+
+class OCRResultCache:
+    """Content-addressed OCR results: in-process LRU with an optional MongoDB tier"""
+
+    def __init__(self):
+        self.memory = TTLCache(settings.ocr_cache_max_entries, settings.ocr_cache_ttl_seconds)
+        self.mongo_hits = 0
+
+    @staticmethod
+    def normalize_options(options: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Fill in defaults so equivalent option sets share a cache entry"""
+        if not options:
+            return None
+        try:
+            return PreprocessingOptions(**options).model_dump()
+        except (TypeError, ValidationError):
+            return options
+
+    @staticmethod
+    def make_key(image: Union[bytes, str], options: Optional[Dict[str, Any]] = None, digest: Optional[str] = None) -> str:
+        """Hash of the raw image bytes plus the normalized preprocessing options"""
+        if digest is None:
+            if not isinstance(image, (bytes, bytearray)):
+                raise ValueError("digest is required when the image is a file path")
+            digest = hashlib.sha256(image).hexdigest()
+        normalized = OCRResultCache.normalize_options(options)
+        options_part = json.dumps(normalized, sort_keys=True, separators=(",", ":"), default=str)
+        options_hash = hashlib.sha256(options_part.encode()).hexdigest()[:16]
+        return f"{digest}:{options_hash}"
+
+    @staticmethod
+    def _collection():
+        if not settings.ocr_cache_mongo or db.database is None:
+            return None
+        return db.database.ocr_cache
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if not settings.ocr_cache_enabled:
+            return None
+
+        result = self.memory.get(key)
+        if result is not None:
+            return dict(result)
+
+        collection = self._collection()
+        if collection is not None:
+            doc = await collection.find_one({"_id": key})
+            if doc is not None:
+                self.mongo_hits += 1
+                self.memory.set(key, doc["result"])
+                return dict(doc["result"])
+
+        return None
+
+    async def set(self, key: str, result: Dict[str, Any]):
+        if not settings.ocr_cache_enabled:
+            return
+
+        self.memory.set(key, dict(result))
+
+        collection = self._collection()
+        if collection is not None:
+            await collection.replace_one(
+                {"_id": key},
+                {"_id": key, "result": result, "created_at": datetime.utcnow()},
+                upsert=True
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.memory.stats()
+        stats["mongo_enabled"] = settings.ocr_cache_mongo
+        stats["mongo_hits"] = self.mongo_hits
+        return stats
+
+
+ocr_cache = OCRResultCache()
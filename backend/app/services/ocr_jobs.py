@@ -0,0 +1,125 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+from bson import Binary, ObjectId
+from pymongo import ReturnDocument
+from ..config import settings
+
+
+TERMINAL_STATES = ("completed", "failed")
+
+
+class OCRJobQueue:
+    """MongoDB-backed queue of OCR jobs shared by the API and `app.worker`"""
+
+    @staticmethod
+    async def submit(db, user_id: ObjectId, image_bytes: bytes, options: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        job = {
+            "user_id": user_id,
+            "state": "queued",
+            "image": Binary(image_bytes),
+            "options": options,
+            "attempts": 0,
+            "created_at": datetime.utcnow(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None
+        }
+        result = await db.ocr_jobs.insert_one(job)
+        job["_id"] = result.inserted_id
+        return job
+
+    @staticmethod
+    async def claim(db, worker_id: str) -> Optional[Dict[str, Any]]:
+        """Atomically take the oldest runnable job (queued, or running with an expired lease)"""
+        now = datetime.utcnow()
+        return await db.ocr_jobs.find_one_and_update(
+            {
+                "$or": [
+                    {"state": "queued"},
+                    {"state": "running", "lease_expires_at": {"$lt": now}}
+                ],
+                "attempts": {"$lt": settings.ocr_job_max_attempts}
+            },
+            {
+                "$set": {
+                    "state": "running",
+                    "worker": worker_id,
+                    "started_at": now,
+                    "lease_expires_at": now + timedelta(seconds=settings.ocr_job_lease_seconds)
+                },
+                "$inc": {"attempts": 1}
+            },
+            sort=[("created_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    @staticmethod
+    async def complete(db, job_id: ObjectId, result: Dict[str, Any]):
+        await db.ocr_jobs.update_one(
+            {"_id": job_id},
+            {
+                "$set": {"state": "completed", "result": result, "error": None, "finished_at": datetime.utcnow()},
+                "$unset": {"image": "", "lease_expires_at": ""}
+            }
+        )
+
+    @staticmethod
+    async def fail(db, job_id: ObjectId, error: str):
+        await db.ocr_jobs.update_one(
+            {"_id": job_id},
+            {
+                "$set": {"state": "failed", "error": error, "finished_at": datetime.utcnow()},
+                "$unset": {"image": "", "lease_expires_at": ""}
+            }
+        )
+
+    @staticmethod
+    async def release(db, job_id: ObjectId, worker_id: str, delay_seconds: float = 0, error: Optional[str] = None):
+        """Give a running job back by expiring its lease, delay_seconds from now
+
+        A claim after that runs it again while attempts remain; once they're
+        used up, fail_abandoned fails it.
+        """
+        await db.ocr_jobs.update_one(
+            {"_id": job_id, "state": "running", "worker": worker_id},
+            {"$set": {
+                "lease_expires_at": datetime.utcnow() + timedelta(seconds=delay_seconds),
+                "error": error
+            }}
+        )
+
+    @staticmethod
+    async def fail_abandoned(db) -> int:
+        """Fail jobs whose lease expired after their last allowed attempt"""
+        result = await db.ocr_jobs.update_many(
+            {
+                "state": "running",
+                "lease_expires_at": {"$lt": datetime.utcnow()},
+                "attempts": {"$gte": settings.ocr_job_max_attempts}
+            },
+            {
+                "$set": {
+                    "state": "failed",
+                    "error": "Job exceeded the maximum number of attempts",
+                    "finished_at": datetime.utcnow()
+                },
+                "$unset": {"image": "", "lease_expires_at": ""}
+            }
+        )
+        return result.modified_count
+
+    @staticmethod
+    async def get(db, job_id: ObjectId, user_id: ObjectId, wait_seconds: float = 0) -> Optional[Dict[str, Any]]:
+        """Fetch a job, long-polling up to wait_seconds for it to finish"""
+        deadline = asyncio.get_running_loop().time() + wait_seconds
+        projection = {"image": 0}
+        while True:
+            job = await db.ocr_jobs.find_one({"_id": job_id, "user_id": user_id}, projection)
+            if job is None or job["state"] in TERMINAL_STATES:
+                return job
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                return job
+            await asyncio.sleep(min(settings.ocr_job_poll_interval_seconds, remaining))
@@ -0,0 +1,245 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional
+from fastapi import HTTPException, status
+from ..config import settings
+
+
+# Tokens of calls whose callers gave up, shared with the workers. A call
+# only needs to find its token while it runs, so a short ring is enough.
+CANCEL_RING_SIZE = 256
+
+# Per worker: what the initializer returned, the barrier warm() probes meet
+# at and the ring of cancelled call tokens
+_worker_state: Dict[str, Any] = {}
+# The token of the call running on this worker thread
+_current_call = threading.local()
+
+
+class OCRCancelledError(Exception):
+    """Raised on a worker when the caller of the running call has given up"""
+
+
+def _initialize_worker(initializer: Optional[Callable[[], Any]], barrier, cancelled):
+    _worker_state["barrier"] = barrier
+    _worker_state["cancelled"] = cancelled
+    _worker_state["result"] = initializer() if initializer is not None else None
+
+
+def _run_call(token: int, fn: Callable[..., Any], *args) -> Any:
+    _current_call.token = token
+    try:
+        return fn(*args)
+    finally:
+        _current_call.token = 0
+
+
+def call_cancelled() -> bool:
+    """Whether the caller of the work running on this worker has given up
+
+    Long-running steps poll this so they can stop early and free the worker.
+    """
+    token = getattr(_current_call, "token", 0)
+    cancelled = _worker_state.get("cancelled")
+    return bool(token) and cancelled is not None and token in cancelled[:]
+
+
+def _initializer_result(timeout: float) -> Any:
+    # Holding this worker until the other probes arrive makes the executor
+    # start a new worker for each one instead of reusing an idle one
+    try:
+        _worker_state["barrier"].wait(timeout)
+    except threading.BrokenBarrierError:
+        pass
+    return _worker_state.get("result")
+
+
+class OCRWorkerPool:
+    """Bounded executor that keeps CPU-bound OCR work off the event loop"""
+
+    def __init__(self):
+        self._executor: Optional[Executor] = None
+        self._initializer: Optional[Callable[[], None]] = None
+        self.workers = 0
+        self.max_queue = 0
+        # Work submitted to the executor and not yet finished there, whether
+        # or not its caller is still waiting
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.cancelled = 0
+        self.rejected = 0
+        # Work finishes on executor threads; counts are adjusted under this
+        self._lock = threading.Lock()
+        # Bounds follow-up work across the process (see run's admitted)
+        self.followup_slots: Optional[asyncio.Semaphore] = None
+        self._cancelled = None
+        self._cancel_index = 0
+        self._next_token = 0
+
+    def start(self, initializer: Optional[Callable[[], None]] = None):
+        """Create the executor from settings; initializer runs once per worker"""
+        if self._executor is not None:
+            return
+        if initializer is not None:
+            self._initializer = initializer
+
+        self.workers = settings.ocr_workers or os.cpu_count() or 1
+        self.max_queue = settings.ocr_max_queue
+        if self.followup_slots is None:
+            self.followup_slots = asyncio.Semaphore(self.workers)
+
+        # Spawn rather than fork so workers don't inherit the event loop
+        # and the Motor client's background threads
+        context = multiprocessing.get_context("spawn")
+        self._cancelled = context.Array("q", CANCEL_RING_SIZE)
+        if settings.ocr_executor == "thread":
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers,
+                thread_name_prefix="ocr",
+                initializer=_initialize_worker,
+                initargs=(self._initializer, threading.Barrier(self.workers), self._cancelled)
+            )
+        else:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=context,
+                initializer=_initialize_worker,
+                initargs=(self._initializer, context.Barrier(self.workers), self._cancelled)
+            )
+
+    async def warm(self, timeout: float = 120) -> List[Any]:
+        """Start every worker now, so each has run the initializer before traffic
+
+        Returns what the initializer returned in each worker.
+        """
+        if self._executor is None:
+            self.start()
+        loop = asyncio.get_running_loop()
+        return await asyncio.gather(*(
+            loop.run_in_executor(self._executor, _initializer_result, timeout) for _ in range(self.workers)
+        ))
+
+    def shutdown(self):
+        """Stop the executor, dropping anything still queued"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self.in_flight - self.workers)
+
+    @property
+    def saturated(self) -> bool:
+        return self.in_flight >= self.workers + self.max_queue
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "executor": settings.ocr_executor,
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "max_queue": self.max_queue,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timed_out": self.timed_out,
+            "cancelled": self.cancelled,
+            "rejected": self.rejected,
+        }
+
+    def _busy_exception(self) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="OCR workers are busy, please retry shortly",
+            headers={"Retry-After": str(settings.ocr_retry_after_seconds)}
+        )
+
+    def _release(self, _future):
+        with self._lock:
+            self.in_flight -= 1
+
+    def _cancel(self, token: int, future):
+        # Tell the worker running this call to stop; queued work was already
+        # dropped by cancelling the future
+        if future.done():
+            return
+        with self._cancelled.get_lock():
+            self._cancelled[self._cancel_index] = token
+            self._cancel_index = (self._cancel_index + 1) % CANCEL_RING_SIZE
+
+    def _restart(self):
+        # A worker died (e.g. killed by the OOM killer); replace the pool
+        # so the next request gets a fresh set of processes
+        self.shutdown()
+        self.start()
+
+    async def run(self, fn: Callable[..., Any], *args, deadline: Optional[float] = None, admitted: bool = False) -> Any:
+        """Run fn(*args) on a worker, or raise 503 if the queue is full
+
+        admitted=True skips the queue check, for follow-up work of a request
+        whose first step was let in, so it isn't refused halfway through.
+        Hold followup_slots around such calls: that keeps them to at most
+        one per worker beyond the queue limit, across all requests.
+
+        With a wall-clock deadline, raises asyncio.TimeoutError once it
+        passes. When the caller times out or is cancelled, work that hasn't
+        started is dropped and work already on a worker is told to stop (see
+        call_cancelled). It keeps its place in in_flight until the worker is
+        actually free, so a caller giving up doesn't free capacity that is
+        still in use.
+        """
+        if self._executor is None:
+            self.start()
+
+        if self.saturated and not admitted:
+            self.rejected += 1
+            raise self._busy_exception()
+
+        self._next_token += 1
+        token = self._next_token
+        try:
+            future = self._executor.submit(_run_call, token, fn, *args)
+        except BrokenProcessPool:
+            self.failed += 1
+            self._restart()
+            raise self._busy_exception()
+        with self._lock:
+            self.in_flight += 1
+        future.add_done_callback(self._release)
+
+        try:
+            # Cancelling the wrapper cancels the executor future if it hasn't started
+            waiter = asyncio.wrap_future(future)
+            if deadline is None:
+                result = await waiter
+            else:
+                result = await asyncio.wait_for(waiter, max(0.0, deadline - time.time()))
+        except TimeoutError:
+            # Ours, or the worker's own OCRTimeoutError
+            self.timed_out += 1
+            self._cancel(token, future)
+            raise
+        except asyncio.CancelledError:
+            # e.g. the client disconnected
+            self.cancelled += 1
+            self._cancel(token, future)
+            raise
+        except BrokenProcessPool:
+            self.failed += 1
+            self._restart()
+            raise self._busy_exception()
+        except Exception:
+            self.failed += 1
+            raise
+        self.completed += 1
+        return result
+
+
+ocr_pool = OCRWorkerPool()
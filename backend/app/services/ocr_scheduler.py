@@ -0,0 +1,229 @@
+import asyncio
+import logging
+import math
+import time
+from collections import OrderedDict, deque
+from typing import Any, Coroutine, Deque, Dict, Optional, Tuple
+from fastapi import HTTPException
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+from ..config import settings
+from ..database import db
+from .ocr_pool import ocr_pool
+
+
+logger = logging.getLogger(__name__)
+
+
+def _rate_limited(retry_after: float, detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail=detail,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+    )
+
+
+class TokenBucket:
+    """Refills at rate tokens/second up to capacity
+
+    A request costing more than the bucket holds is admitted whenever the
+    bucket is full and leaves it in debt, so large batches are allowed but
+    delay the same user's next requests instead of being rejected forever.
+    """
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def take(self, cost: float) -> float:
+        """Take cost tokens; returns 0 if admitted, else seconds until it would be"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+        need = min(cost, self.capacity)
+        if self.tokens >= need:
+            self.tokens -= cost
+            return 0.0
+        return (need - self.tokens) / self.rate if self.rate > 0 else float(settings.ocr_retry_after_seconds)
+
+
+class OCRScheduler:
+    """Per-user admission control and fair ordering in front of the OCR pool
+
+    admit() applies a token bucket per user (in process, or in MongoDB so the
+    limit holds across uvicorn workers). slot() then hands out a fixed number
+    of concurrent OCR slots round-robin across users, so one user's backlog
+    waits behind everyone else's next request instead of in front of it.
+    """
+
+    def __init__(self):
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        # user id -> waiters, in round-robin order
+        self._waiting: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        self._running: Dict[str, int] = {}
+        self.active = 0
+        self.admitted = 0
+        self.throttled = 0
+        self.rejected = 0
+
+    @property
+    def slots(self) -> int:
+        return settings.ocr_scheduler_slots or ocr_pool.workers or 1
+
+    @property
+    def queued(self) -> int:
+        return sum(len(waiters) for waiters in self._waiting.values())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "slots": self.slots,
+            "active": self.active,
+            "queued": self.queued,
+            "users_running": len(self._running),
+            "users_waiting": len(self._waiting),
+            "admitted": self.admitted,
+            "throttled": self.throttled,
+            "rejected": self.rejected,
+        }
+
+    # Admission
+
+    def _local_take(self, user_id: str, cost: float) -> float:
+        bucket = self._buckets.get(user_id)
+        if bucket is None:
+            bucket = TokenBucket(settings.ocr_rate_burst, settings.ocr_rate_per_minute / 60)
+            self._buckets[user_id] = bucket
+            # Idle users' buckets are full again anyway, so the oldest can go
+            while len(self._buckets) > settings.ocr_rate_max_users:
+                self._buckets.popitem(last=False)
+        self._buckets.move_to_end(user_id)
+        return bucket.take(cost)
+
+    @staticmethod
+    async def _mongo_take(user_id: str, cost: float) -> float:
+        """Same bucket as TokenBucket.take, updated atomically in one round trip"""
+        capacity = float(settings.ocr_rate_burst)
+        rate = settings.ocr_rate_per_minute / 60
+        elapsed = {"$divide": [{"$subtract": ["$$NOW", {"$ifNull": ["$updated_at", "$$NOW"]}]}, 1000]}
+        refilled = {"$min": [
+            capacity,
+            {"$add": [{"$ifNull": ["$tokens", capacity]}, {"$multiply": [elapsed, rate]}]}
+        ]}
+        need = min(cost, capacity)
+        # Full again after capacity / rate seconds, so the document can expire then
+        expire_ms = int(capacity / rate * 1000) if rate > 0 else 86400 * 1000
+
+        bucket = await db.database.ocr_rate_limits.find_one_and_update(
+            {"_id": user_id},
+            [
+                {"$set": {"tokens": refilled, "updated_at": "$$NOW"}},
+                {"$set": {"admitted": {"$gte": ["$tokens", need]}}},
+                {"$set": {
+                    "tokens": {"$cond": ["$admitted", {"$subtract": ["$tokens", cost]}, "$tokens"]},
+                    "expires_at": {"$add": ["$$NOW", expire_ms]}
+                }},
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        if bucket["admitted"]:
+            return 0.0
+        return (need - bucket["tokens"]) / rate if rate > 0 else float(settings.ocr_retry_after_seconds)
+
+    async def admit(self, user_id: str, cost: float = 1):
+        """Charge cost OCR requests to the user, or raise 429 with Retry-After"""
+        if not settings.ocr_rate_limit_enabled:
+            return
+
+        retry_after = None
+        if settings.ocr_rate_limit_mongo and db.database is not None:
+            try:
+                retry_after = await self._mongo_take(user_id, cost)
+            except PyMongoError as e:
+                logger.warning("Shared rate limit unavailable, using local limit: %s", e)
+        if retry_after is None:
+            retry_after = self._local_take(user_id, cost)
+
+        if retry_after > 0:
+            self.throttled += 1
+            raise _rate_limited(retry_after, "OCR rate limit exceeded, please retry later")
+        self.admitted += 1
+
+    # Fair scheduling
+
+    def _next_waiter(self) -> Optional[Tuple[str, asyncio.Future]]:
+        while self._waiting:
+            user_id, waiters = next(iter(self._waiting.items()))
+            waiter = waiters.popleft()
+            # Rotate the user to the back so the next slot goes to someone else
+            if waiters:
+                self._waiting.move_to_end(user_id)
+            else:
+                del self._waiting[user_id]
+            if not waiter.done():
+                return user_id, waiter
+        return None
+
+    def _release(self, user_id: str):
+        self._running[user_id] -= 1
+        if not self._running[user_id]:
+            del self._running[user_id]
+
+        nxt = self._next_waiter()
+        if nxt is None:
+            self.active -= 1
+            return
+        # Hand the slot straight to the next user in line
+        next_user, waiter = nxt
+        self._running[next_user] = self._running.get(next_user, 0) + 1
+        waiter.set_result(None)
+
+    async def _acquire(self, user_id: str):
+        if self.active < self.slots and not self._waiting:
+            self.active += 1
+            self._running[user_id] = self._running.get(user_id, 0) + 1
+            return
+
+        waiters = self._waiting.get(user_id)
+        if waiters is None:
+            waiters = self._waiting[user_id] = deque()
+        if len(waiters) >= settings.ocr_user_max_queued:
+            if not waiters:
+                del self._waiting[user_id]
+            self.rejected += 1
+            raise _rate_limited(
+                settings.ocr_retry_after_seconds,
+                "Too many OCR requests waiting, please retry later"
+            )
+
+        waiter = asyncio.get_running_loop().create_future()
+        waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we were cancelled
+                self._release(user_id)
+            elif waiter in waiters:
+                waiters.remove(waiter)
+                if not waiters and self._waiting.get(user_id) is waiters:
+                    del self._waiting[user_id]
+            raise
+
+    async def run(self, user_id: str, coro: Coroutine) -> Any:
+        """Await coro once the user's turn for an OCR slot comes up"""
+        try:
+            await self._acquire(user_id)
+        except BaseException:
+            coro.close()
+            raise
+        try:
+            return await coro
+        finally:
+            self._release(user_id)
+
+
+ocr_scheduler = OCRScheduler()
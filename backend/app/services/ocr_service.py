@@ -1,16 +1,251 @@
 import pytesseract
-from PIL import Image, ImageEnhance
+from PIL import Image
 import io
 import os
+import mmap
+import time
+import asyncio
 import base64
+import logging
+import subprocess
+import threading
 from fastapi import HTTPException
-from typing import Optional, Dict, Any
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, Iterator, List, Tuple, Union
+from ..config import settings
+from .document_ingest import UnsupportedDocumentError, detect_document, load_page
+from .metrics import StageTimer, ocr_requests
+from .ocr_cache import ocr_cache
+from .ocr_pool import OCRCancelledError, call_cancelled, ocr_pool
+from .preprocessing import Box, PreprocessingPlan, plan_preprocessing, run_pipeline
+from .preview_store import encode_preview, preview_store
+
+try:
+    import tesserocr
+except ImportError:  # optional: in-process Tesseract C API bindings
+    tesserocr = None
+
+
+logger = logging.getLogger(__name__)
+
+
+# Raw image bytes, or the path of an upload spooled to disk
+ImageSource = Union[bytes, str]
+
+# Refuse to decode images over the pixel limit (PIL raises at twice this)
+Image.MAX_IMAGE_PIXELS = settings.max_image_pixels // 2
+
+
+class OCRProcessingError(Exception):
+    """Raised by pool workers when an image can't be processed"""
+
+
+class OCRTimeoutError(TimeoutError):
+    """Raised when OCR work runs past its deadline"""
+
+
+def remaining_seconds(deadline: Optional[float]) -> Optional[float]:
+    """Time left before a wall-clock deadline; raises once it has passed"""
+    if deadline is None:
+        return None
+    remaining = deadline - time.time()
+    if remaining <= 0:
+        raise OCRTimeoutError("OCR deadline exceeded")
+    return remaining
+
+
+@contextmanager
+def open_source(source: ImageSource) -> Iterator[Image.Image]:
+    """Open an image lazily; spooled files are memory-mapped rather than read"""
+    if isinstance(source, (bytes, bytearray)):
+        with Image.open(io.BytesIO(source)) as image:
+            yield image
+        return
+
+    with open(source, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        with Image.open(mapped) as image:
+            yield image
+
+
+# How often a running tesseract process checks whether its caller gave up
+CANCEL_POLL_SECONDS = 0.25
+
+
+class OCREngine:
+    """Turns a preprocessed PIL image into text"""
+    name = "base"
+    # Whether layout_regions returns the engine's own page segmentation
+    has_layout = False
+
+    def warm_up(self):
+        """Load models ahead of the first request"""
+
+    def image_to_string(self, image: Image.Image, single_block: bool = False, timeout: Optional[float] = None) -> str:
+        """Recognize image, giving up with OCRTimeoutError after timeout seconds"""
+        raise NotImplementedError
+
+    def layout_regions(self, image: Image.Image, target_regions: int = 1) -> List[Box]:
+        """Boxes around the text blocks of image, in reading order
+
+        Empty without layout analysis: cutting the page anywhere but where
+        the engine would changes the recognized text, so it stays whole.
+        """
+        return []
+
+
+class PytesseractEngine(OCREngine):
+    """Runs the tesseract binary as a subprocess for every image"""
+    name = "pytesseract"
+
+    def __init__(self, tesseract_cmd: Optional[str], lang: str):
+        self.lang = lang
+        if tesseract_cmd:
+            pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+
+    def warm_up(self):
+        # Fails fast if the binary or language data is missing
+        if self.lang not in pytesseract.get_languages():
+            logger.warning("Tesseract language data %r is not installed", self.lang)
+
+    def image_to_string(self, image: Image.Image, single_block: bool = False, timeout: Optional[float] = None) -> str:
+        if image.mode not in ("1", "L", "RGB", "RGBA"):
+            image = image.convert("RGB")
+        png = io.BytesIO()
+        image.save(png, format="PNG")
+
+        args = [pytesseract.pytesseract.tesseract_cmd, "stdin", "stdout", "-l", self.lang]
+        if single_block:
+            args += ["--psm", "6"]
+        try:
+            process = subprocess.Popen(args, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        except FileNotFoundError:
+            raise pytesseract.TesseractNotFoundError() from None
+
+        # Wait in short steps rather than for the whole timeout, so the
+        # process is killed as soon as the caller gives up
+        give_up_at = time.monotonic() + timeout if timeout else None
+        data = png.getvalue()
+        while True:
+            try:
+                output, errors = process.communicate(data, timeout=CANCEL_POLL_SECONDS)
+                break
+            except subprocess.TimeoutExpired:
+                data = None  # already handed to communicate
+            cancelled = call_cancelled()
+            if cancelled or (give_up_at is not None and time.monotonic() >= give_up_at):
+                process.kill()
+                process.communicate()
+                if cancelled:
+                    raise OCRCancelledError("OCR cancelled by the caller")
+                raise OCRTimeoutError("OCR deadline exceeded")
+
+        if process.returncode != 0:
+            raise pytesseract.TesseractError(process.returncode, errors.decode("utf-8", "replace").strip())
+        return output.decode("utf-8")
+
+
+class TesserocrEngine(OCREngine):
+    """Keeps one warm Tesseract API instance per worker thread via tesserocr"""
+    name = "tesserocr"
+    has_layout = True
+
+    def __init__(self, lang: str, tessdata_path: Optional[str] = None):
+        self.lang = lang
+        self.tessdata_path = tessdata_path
+        self._local = threading.local()
+
+    def _api(self):
+        api = getattr(self._local, "api", None)
+        if api is None:
+            kwargs = {"lang": self.lang}
+            if self.tessdata_path:
+                kwargs["path"] = self.tessdata_path
+            api = tesserocr.PyTessBaseAPI(**kwargs)
+            self._local.api = api
+        return api
+
+    def warm_up(self):
+        self._api()
+
+    def image_to_string(self, image: Image.Image, single_block: bool = False, timeout: Optional[float] = None) -> str:
+        api = self._api()
+        try:
+            if single_block:
+                api.SetPageSegMode(tesserocr.PSM.SINGLE_BLOCK)
+            api.SetImage(image)
+            # Recognize stops early and returns False once the timeout passes
+            if timeout and not api.Recognize(max(1, int(timeout * 1000))):
+                raise OCRTimeoutError("OCR deadline exceeded")
+            return api.GetUTF8Text()
+        finally:
+            api.Clear()
+            if single_block:
+                api.SetPageSegMode(tesserocr.PSM.AUTO)
+
+    def layout_regions(self, image: Image.Image, target_regions: int = 1) -> List[Box]:
+        """Tesseract's own layout analysis, without recognition
+
+        Blocks, or paragraphs when there are too few blocks to keep the
+        workers busy; never anything finer, since a region cut mid-paragraph
+        is recognized differently from the whole page.
+        """
+        api = self._api()
+        try:
+            api.SetImage(image)
+            regions = []
+            for level in (tesserocr.RIL.BLOCK, tesserocr.RIL.PARA):
+                components = api.GetComponentImages(level, True)
+                boxes = [(c["x"], c["y"], c["x"] + c["w"], c["y"] + c["h"]) for _, c, _, _ in components]
+                if len(boxes) > len(regions):
+                    regions = boxes
+                if len(regions) >= target_regions:
+                    break
+            return regions
+        finally:
+            api.Clear()
+
+
+_engine: Optional[OCREngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> OCREngine:
+    """Resolve the configured OCR engine once per process"""
+    global _engine
+    if _engine is not None:
+        return _engine
+
+    with _engine_lock:
+        if _engine is None:
+            _engine = _create_engine()
+            logger.info("Using %s OCR engine", _engine.name)
+    return _engine
+
+
+def _create_engine() -> OCREngine:
+    lang = settings.tesseract_lang
+    tessdata_path = settings.tessdata_prefix or os.getenv("TESSDATA_PREFIX")
+
+    if settings.ocr_engine in ("auto", "tesserocr") and tesserocr is not None:
+        engine = TesserocrEngine(lang, tessdata_path)
+        try:
+            engine.warm_up()
+            return engine
+        except RuntimeError as e:
+            logger.warning("tesserocr unavailable (%s), falling back to pytesseract", e)
+    elif settings.ocr_engine == "tesserocr":
+        logger.warning("tesserocr is not installed, falling back to pytesseract")
+
+    return PytesseractEngine(OCRService._get_tesseract_path(), lang)
 
 
 class OCRService:
     @staticmethod
     def _get_tesseract_path():
         """Get Tesseract executable path"""
+        if settings.tesseract_cmd:
+            return settings.tesseract_cmd
+        
         # Common Windows installation paths
         possible_paths = [
             r"C:\Program Files\Tesseract-OCR\tesseract.exe",
@@ -31,40 +266,21 @@ class OCRService:
         
         return None
 
+    @staticmethod
+    def make_plan(image: Image.Image, options: Optional[Dict[str, Any]]) -> PreprocessingPlan:
+        """Plan preprocessing for an opened image using the server defaults"""
+        return plan_preprocessing(
+            image.size,
+            options,
+            max_dimension=settings.ocr_max_image_dimension,
+            normalize_resolution=settings.ocr_normalize_resolution,
+            target_text_height=settings.ocr_target_text_height
+        )
+
     @staticmethod
     def preprocess_image(image: Image.Image, options: Dict[str, Any]) -> Image.Image:
         """Preprocess image based on user options"""
-        processed_image = image.copy()
-        
-        # Apply rotation
-        if options.get('rotation', 0) != 0:
-            rotation = options['rotation']
-            if rotation == 90:
-                processed_image = processed_image.rotate(-90, expand=True)
-            elif rotation == 180:
-                processed_image = processed_image.rotate(180, expand=True)
-            elif rotation == 270:
-                processed_image = processed_image.rotate(90, expand=True)
-        
-        # Apply cropping
-        if options.get('crop'):
-            crop_data = options['crop']
-            left = int(crop_data['x'])
-            top = int(crop_data['y'])
-            right = int(crop_data['x'] + crop_data['width'])
-            bottom = int(crop_data['y'] + crop_data['height'])
-            processed_image = processed_image.crop((left, top, right, bottom))
-        
-        # Convert to grayscale if requested
-        if options.get('grayscale', False):
-            processed_image = processed_image.convert('L')
-        
-        # Apply contrast enhancement if requested
-        if options.get('enhance_contrast', False):
-            enhancer = ImageEnhance.Contrast(processed_image)
-            processed_image = enhancer.enhance(1.5)
-        
-        return processed_image
+        return run_pipeline(image, OCRService.make_plan(image, options))
 
     @staticmethod
     def image_to_base64(image: Image.Image) -> str:
@@ -75,45 +291,344 @@ class OCRService:
         return f"data:image/png;base64,{img_str}"
 
     @staticmethod
-    async def extract_text_from_image(image_bytes: bytes, preprocessing_options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        """Extract text from image using pytesseract OCR with preprocessing"""
+    def warm_up() -> Optional[str]:
+        """Resolve and load the OCR engine (runs once in each pool worker); returns any error"""
         try:
-            # Set Tesseract path
-            tesseract_path = OCRService._get_tesseract_path()
-            if tesseract_path:
-                pytesseract.pytesseract.tesseract_cmd = tesseract_path
-            
-            # Convert bytes to PIL Image
-            original_image = Image.open(io.BytesIO(image_bytes))
-            
-            # Convert to RGB if necessary
-            if original_image.mode != 'RGB':
-                original_image = original_image.convert('RGB')
-            
-            # Apply preprocessing if options provided
-            if preprocessing_options:
-                processed_image = OCRService.preprocess_image(original_image, preprocessing_options)
-                # Convert processed image to base64 for preview
-                processed_preview = OCRService.image_to_base64(processed_image)
-            else:
-                processed_image = original_image
-                processed_preview = None
-            
-            # Extract text using pytesseract
-            extracted_text = pytesseract.image_to_string(processed_image, lang='eng')
+            get_engine().warm_up()
+        except Exception as e:
+            # Don't take the worker down; the error resurfaces per request
+            logger.warning("OCR engine warm-up failed: %s", e)
+            return str(e)
+        return None
+
+    @staticmethod
+    def _prepare(
+        original_image: Image.Image,
+        preprocessing_options: Optional[Dict[str, Any]],
+        timer: StageTimer
+    ) -> Tuple[Image.Image, Dict[str, Any]]:
+        """Preprocess an opened image; returns it with the result fields known so far"""
+        # Read before preprocessing: JPEG draft decoding changes the size
+        original_size = original_image.size
+        
+        # The pipeline also handles RGB conversion and oversized images, so it
+        # runs even without options; the preview is only built when asked for.
+        # Decoding is lazy, so "preprocess" includes it.
+        with timer.stage("preprocess"):
+            plan = OCRService.make_plan(original_image, preprocessing_options)
+            processed_image = run_pipeline(original_image, plan)
+        if preprocessing_options:
+            # A bounded thumbnail; the API stores it and returns a preview URL
+            with timer.stage("preview"):
+                preview_image = encode_preview(processed_image, settings.preview_max_dimension)
+        else:
+            preview_image = None
+        
+        return processed_image, {
+            "preview_image": preview_image,
+            "original_size": original_size,
+            "processed_size": processed_image.size,
+            "scale": plan.applied_scale,
+            "text_height": plan.text_height
+        }
+
+    @staticmethod
+    def _recognize(
+        original_image: Image.Image,
+        preprocessing_options: Optional[Dict[str, Any]],
+        deadline: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Preprocess and OCR a decoded image; result["timings"] has seconds per stage"""
+        timer = StageTimer()
+        processed_image, result = OCRService._prepare(original_image, preprocessing_options, timer)
+        
+        # Extract text using the OCR engine
+        with timer.stage("ocr"):
+            extracted_text = get_engine().image_to_string(processed_image, timeout=remaining_seconds(deadline))
+        
+        # Clean up the text
+        result["extracted_text"] = extracted_text.strip()
+        result["timings"] = timer.timings
+        return result
+
+    @staticmethod
+    def process_image(
+        source: ImageSource,
+        preprocessing_options: Optional[Dict[str, Any]] = None,
+        deadline: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Decode, preprocess and OCR an image (blocking, runs on a pool worker)"""
+        try:
+            # Work that sat in the queue past its deadline is dropped unstarted
+            remaining_seconds(deadline)
+            with open_source(source) as original_image:
+                return OCRService._recognize(original_image, preprocessing_options, deadline)
+        except OCRTimeoutError:
+            raise
+        except Exception as e:
+            # Re-raise as a plain exception: some library exceptions can't be
+            # unpickled in the parent and would break the process pool
+            raise OCRProcessingError(str(e)) from None
+
+    @staticmethod
+    def process_layout(
+        source: ImageSource,
+        preprocessing_options: Optional[Dict[str, Any]],
+        target_regions: int,
+        deadline: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Preprocess once and cut out the text regions (blocking, runs on a pool worker)
+
+        Regions come back as raw (mode, size, pixels) so any worker can
+        recognize them. A page with a single region is recognized here.
+        """
+        try:
+            remaining_seconds(deadline)
+            engine = get_engine()
+            timer = StageTimer()
+            with open_source(source) as original_image:
+                processed_image, result = OCRService._prepare(original_image, preprocessing_options, timer)
+                result["timings"] = timer.timings
+                
+                with timer.stage("layout"):
+                    boxes = engine.layout_regions(processed_image, target_regions) if engine.has_layout else []
+                if len(boxes) <= 1:
+                    with timer.stage("ocr"):
+                        result["extracted_text"] = engine.image_to_string(
+                            processed_image, timeout=remaining_seconds(deadline)
+                        ).strip()
+                    result["regions"] = []
+                else:
+                    result["regions"] = [
+                        (region.mode, region.size, region.tobytes())
+                        for region in (processed_image.crop(box) for box in boxes)
+                    ]
+                return result
+        except OCRTimeoutError:
+            raise
+        except Exception as e:
+            raise OCRProcessingError(str(e)) from None
+
+    @staticmethod
+    def recognize_region(region: Tuple[str, Tuple[int, int], bytes], deadline: Optional[float] = None) -> str:
+        """OCR one region cut out by process_layout (blocking, runs on a pool worker)"""
+        try:
+            timeout = remaining_seconds(deadline)
+            image = Image.frombytes(*region)
+            return get_engine().image_to_string(image, single_block=True, timeout=timeout).strip()
+        except OCRTimeoutError:
+            raise
+        except Exception as e:
+            raise OCRProcessingError(str(e)) from None
+
+    @staticmethod
+    async def _extract_by_regions(source: ImageSource, preprocessing_options: Dict[str, Any], deadline: float) -> Dict[str, Any]:
+        """Layout once, then recognize the text regions on several workers
+
+        The layout step is where the request is admitted or refused with a
+        503; its regions then always get a worker, so a request never fails
+        part way through for lack of capacity.
+        """
+        result = await ocr_pool.run(
+            OCRService.process_layout, source, preprocessing_options, ocr_pool.workers * 2, deadline,
+            deadline=deadline
+        )
+        regions = result.pop("regions")
+        if regions:
+            async def run_region(region):
+                # Shared by every region-parallel request in this process, so
+                # together they never add more than one region per worker
+                async with ocr_pool.followup_slots:
+                    return await ocr_pool.run(
+                        OCRService.recognize_region, region, deadline, deadline=deadline, admitted=True
+                    )
             
-            # Clean up the text
-            cleaned_text = extracted_text.strip()
+            started = time.perf_counter()
+            texts = await asyncio.gather(*(run_region(region) for region in regions))
+            result["timings"]["ocr"] = time.perf_counter() - started
+            result["extracted_text"] = "\n\n".join(text for text in texts if text)
+        result["regions"] = len(regions)
+        return result
+
+    @staticmethod
+    def process_page(
+        path: str,
+        kind: str,
+        page_index: int,
+        preprocessing_options: Optional[Dict[str, Any]] = None,
+        deadline: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Decode and OCR one page of a multi-page file (blocking, runs on a pool worker)"""
+        try:
+            remaining_seconds(deadline)
+            started = time.perf_counter()
+            with load_page(path, kind, page_index) as page_image:
+                decoded = time.perf_counter()
+                result = OCRService._recognize(page_image, preprocessing_options, deadline)
             
-            return {
-                "extracted_text": cleaned_text,
-                "processed_preview": processed_preview,
-                "original_size": original_image.size,
-                "processed_size": processed_image.size
+            # Previews of every page would dwarf the text
+            result.pop("preview_image", None)
+            result["timings"] = {
+                "decode_seconds": round(decoded - started, 4),
+                "ocr_seconds": round(time.perf_counter() - decoded, 4)
             }
-            
+            return result
+        except OCRTimeoutError:
+            raise
+        except Exception as e:
+            raise OCRProcessingError(str(e)) from None
+
+    @staticmethod
+    async def extract_text_from_image(
+        image: ImageSource,
+        preprocessing_options: Optional[Dict[str, Any]] = None,
+        digest: Optional[str] = None,
+        timeout: Optional[float] = None,
+        use_cache: bool = True,
+        user_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Extract text from image using pytesseract OCR with preprocessing
+
+        image is the raw bytes or the path of a spooled upload; pass the
+        SHA-256 digest when it is already known (it is required for paths).
+        timeout overrides OCR_TIMEOUT_SECONDS; past it the tesseract work is
+        stopped and a 504 is raised. use_cache=False always runs OCR (the
+        fresh result still replaces the cached one). The preview is only
+        linked, and only served, for user_id.
+        """
+        timer = StageTimer()
+        cache_key = ocr_cache.make_key(image, preprocessing_options, digest)
+        with timer.stage("cache"):
+            cached = await ocr_cache.get(cache_key) if use_cache else None
+        if cached is not None:
+            ocr_requests.inc(outcome="cached")
+            timer.record()
+            return OCRService._with_preview_url({**cached, "timings": timer.timings}, user_id)
+
+        timeout = OCRService.clamp_timeout(timeout)
+        deadline = time.time() + timeout
+        started = time.perf_counter()
+        try:
+            # Regions only pay for their extra transfers with workers to spread over
+            if preprocessing_options and preprocessing_options.get('region_parallel') and ocr_pool.workers > 1:
+                result = await OCRService._extract_by_regions(image, preprocessing_options, deadline)
+            else:
+                result = await ocr_pool.run(
+                    OCRService.process_image, image, preprocessing_options, deadline,
+                    deadline=deadline
+                )
+        except HTTPException:
+            ocr_requests.inc(outcome="error")
+            raise
+        except (OCRTimeoutError, asyncio.TimeoutError):
+            ocr_requests.inc(outcome="timeout")
+            raise OCRService._timeout_exception(timeout)
         except Exception as e:
+            ocr_requests.inc(outcome="error")
             raise HTTPException(
                 status_code=400,
                 detail=f"Error processing image: {str(e)}"
             )
+        
+        # Whatever the worker didn't spend on a stage was queueing and transfer
+        worker_timings = result.pop("timings", {})
+        timer.timings.update(worker_timings)
+        timer.add("queue", max(0.0, time.perf_counter() - started - sum(worker_timings.values())))
+
+        # Keep the preview out of the JSON: store it and hand back a URL
+        with timer.stage("store"):
+            preview_image = result.pop("preview_image", None)
+            if preview_image is not None:
+                result["preview_id"] = preview_store.make_id(cache_key)
+                preview_store.put(result["preview_id"], preview_image)
+            
+            await ocr_cache.set(cache_key, result)
+        
+        ocr_requests.inc(outcome="ok")
+        timer.record()
+        return OCRService._with_preview_url({**result, "timings": timer.timings}, user_id)
+
+    @staticmethod
+    def clamp_timeout(timeout: Optional[float], default: Optional[float] = None) -> float:
+        """Per-request timeout, or the server default, capped at the server maximum"""
+        if timeout is None:
+            timeout = default or settings.ocr_timeout_seconds
+        return min(timeout, settings.ocr_max_timeout_seconds)
+
+    @staticmethod
+    def _timeout_exception(timeout: float) -> HTTPException:
+        return HTTPException(
+            status_code=504,
+            detail=f"OCR timeout exceeded ({timeout:g}s)"
+        )
+
+    @staticmethod
+    def _with_preview_url(result: Dict[str, Any], user_id: Optional[str]) -> Dict[str, Any]:
+        preview_id = result.get("preview_id")
+        if preview_id and user_id and preview_id in preview_store:
+            preview_store.grant(preview_id, user_id)
+            result["processed_preview"] = f"/documents/previews/{preview_id}"
+        else:
+            # Evicted, cached by another process, or no user to serve it to
+            result["preview_id"] = None
+            result["processed_preview"] = None
+        return result
+
+    @staticmethod
+    async def extract_text_from_document(
+        path: str,
+        preprocessing_options: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """OCR every page of a multi-page TIFF or PDF, several pages at a time
+
+        timeout bounds the whole document (default OCR_DOCUMENT_TIMEOUT_SECONDS);
+        pages not finished by then report a timeout error.
+        """
+        started = time.perf_counter()
+        timeout = OCRService.clamp_timeout(timeout, settings.ocr_document_timeout_seconds)
+        deadline = time.time() + timeout
+        try:
+            kind, page_count = await asyncio.to_thread(detect_document, path)
+        except UnsupportedDocumentError as e:
+            raise HTTPException(status_code=415, detail=str(e))
+        except Exception as e:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Error reading document: {str(e)}"
+            )
+        
+        if page_count > settings.max_document_pages:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Documents may have at most {settings.max_document_pages} pages"
+            )
+        
+        # Only this many pages are decoded at once, whatever the page count
+        semaphore = asyncio.Semaphore(settings.ocr_page_concurrency)
+        
+        async def run_page(page_index: int) -> Dict[str, Any]:
+            async with semaphore:
+                page = {"page": page_index + 1}
+                try:
+                    result = await ocr_pool.run(
+                        OCRService.process_page, path, kind, page_index, preprocessing_options, deadline,
+                        deadline=deadline
+                    )
+                    page.update(result)
+                except HTTPException as e:
+                    page["error"] = e.detail
+                except (OCRTimeoutError, asyncio.TimeoutError):
+                    page["error"] = OCRService._timeout_exception(timeout).detail
+                except Exception as e:
+                    page["error"] = f"Error processing page: {str(e)}"
+                return page
+        
+        pages = await asyncio.gather(*(run_page(i) for i in range(page_count)))
+        
+        return {
+            "page_count": page_count,
+            "extracted_text": "\n\n".join(p.get("extracted_text", "") for p in pages if p.get("extracted_text")),
+            "pages": pages,
+            "elapsed_seconds": round(time.perf_counter() - started, 4)
+        }
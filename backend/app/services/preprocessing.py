@@ -0,0 +1,302 @@
+"""Planned image preprocessing pipeline.
+
+The stages are reordered so that each one touches as few pixels as
+possible: the crop is mapped back through the rotation and applied
+first, JPEGs are decoded straight to the target size with ``draft``,
+grayscale is converted directly from the source mode, and contrast
+stretching and binarization are single lookup-table passes.
+
+Resolution normalization estimates the height of the text lines and
+downscales images whose text is taller than ``target_text_height``
+pixels, so high-resolution photos don't cost tesseract more time than
+the text needs. It never enlarges an image.
+"""
+import math
+import statistics
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from PIL import Image
+
+
+Box = Tuple[int, int, int, int]
+
+# Rotation option (clockwise degrees) -> transpose that produces it
+_TRANSPOSE = {
+    90: Image.Transpose.ROTATE_270,
+    180: Image.Transpose.ROTATE_180,
+    270: Image.Transpose.ROTATE_90,
+}
+
+CONTRAST_FACTOR = 1.5
+
+# Text height estimation runs on a thumbnail this size
+ESTIMATE_DIMENSION = 1024
+# Resampling limits for resolution normalization (downscale only: enlarging
+# small text multiplies OCR time), and the dead band below 1.0 where
+# resampling isn't worth the pass over the image
+MIN_NORMALIZE_SCALE = 0.25
+MAX_NORMALIZE_SCALE = 1.0
+NORMALIZE_TOLERANCE = 0.15
+
+
+@dataclass
+class PreprocessingPlan:
+    source_size: Tuple[int, int]
+    crop: Optional[Box] = None  # in source (unrotated) coordinates
+    rotation: int = 0
+    scale: float = 1.0
+    grayscale: bool = False
+    enhance_contrast: bool = False
+    binarize: bool = False
+    normalize_resolution: bool = False
+    target_text_height: int = 40
+    max_dimension: int = 0
+    # Filled in by run_pipeline
+    text_height: Optional[float] = None
+    applied_scale: float = 1.0
+
+    @property
+    def output_mode(self) -> str:
+        return "L" if self.grayscale or self.binarize else "RGB"
+
+
+def map_crop_to_source(crop: Box, rotation: int, size: Tuple[int, int]) -> Box:
+    """Translate a crop box drawn on the rotated image into source coordinates"""
+    left, top, right, bottom = crop
+    width, height = size
+    if rotation == 90:
+        return (top, height - right, bottom, height - left)
+    if rotation == 180:
+        return (width - right, height - bottom, width - left, height - top)
+    if rotation == 270:
+        return (width - bottom, left, width - top, right)
+    return crop
+
+
+def plan_preprocessing(
+    size: Tuple[int, int],
+    options: Optional[Dict[str, Any]],
+    max_dimension: int = 0,
+    normalize_resolution: bool = False,
+    target_text_height: int = 40
+) -> PreprocessingPlan:
+    """Build a plan from user options and the source image header size
+
+    normalize_resolution and target_text_height are the server defaults;
+    options of the same name override them per request.
+    """
+    options = options or {}
+    rotation = options.get('rotation', 0) if options.get('rotation', 0) in _TRANSPOSE else 0
+    if options.get('normalize_resolution') is not None:
+        normalize_resolution = bool(options['normalize_resolution'])
+    plan = PreprocessingPlan(
+        source_size=size,
+        rotation=rotation,
+        grayscale=bool(options.get('grayscale', False)),
+        enhance_contrast=bool(options.get('enhance_contrast', False)),
+        binarize=bool(options.get('binarize', False)),
+        normalize_resolution=normalize_resolution,
+        target_text_height=int(options.get('target_text_height') or target_text_height),
+        max_dimension=max_dimension,
+    )
+
+    if options.get('crop'):
+        crop_data = options['crop']
+        left = int(crop_data['x'])
+        top = int(crop_data['y'])
+        right = int(crop_data['x'] + crop_data['width'])
+        bottom = int(crop_data['y'] + crop_data['height'])
+        plan.crop = map_crop_to_source((left, top, right, bottom), rotation, size)
+
+    if max_dimension:
+        region = plan.crop or (0, 0) + size
+        longest = max(region[2] - region[0], region[3] - region[1])
+        if longest > max_dimension:
+            plan.scale = max_dimension / longest
+
+    return plan
+
+
+def _draft(image: Image.Image, plan: PreprocessingPlan) -> float:
+    """Let the JPEG decoder skip detail we'd throw away; returns the decode scale"""
+    if image.format != "JPEG" or (plan.scale >= 1 and plan.output_mode != "L"):
+        return 1.0
+    width, height = plan.source_size
+    requested = (max(1, int(width * plan.scale)), max(1, int(height * plan.scale)))
+    # JPEG can decode luminance only when the result is going grayscale anyway
+    image.draft("L" if plan.output_mode == "L" else "RGB", requested)
+    return image.size[0] / width
+
+
+def _contrast_lut(image: Image.Image) -> List[int]:
+    """Same curve as ImageEnhance.Contrast, around the image's mean luminance"""
+    histogram = image.histogram()
+    if image.mode == "L":
+        total = sum(histogram)
+        mean = sum(i * count for i, count in enumerate(histogram)) / total if total else 0
+    else:
+        means = []
+        for band in range(3):
+            band_histogram = histogram[band * 256:(band + 1) * 256]
+            total = sum(band_histogram)
+            means.append(sum(i * count for i, count in enumerate(band_histogram)) / total if total else 0)
+        mean = 0.299 * means[0] + 0.587 * means[1] + 0.114 * means[2]
+    degenerate = int(mean + 0.5)
+
+    lut = []
+    for value in range(256):
+        out = degenerate + CONTRAST_FACTOR * (value - degenerate)
+        lut.append(0 if out <= 0 else 255 if out >= 255 else int(out))
+    return lut
+
+
+def otsu_threshold(histogram: List[int]) -> int:
+    """Threshold that best separates ink from paper in a grayscale histogram"""
+    total = sum(histogram)
+    if not total:
+        return 128
+    sum_all = sum(i * count for i, count in enumerate(histogram))
+    sum_background = 0.0
+    weight_background = 0
+    best_threshold, best_variance = 0, -1.0
+    for threshold, count in enumerate(histogram):
+        weight_background += count
+        if weight_background == 0:
+            continue
+        weight_foreground = total - weight_background
+        if weight_foreground == 0:
+            break
+        sum_background += threshold * count
+        mean_background = sum_background / weight_background
+        mean_foreground = (sum_all - sum_background) / weight_foreground
+        variance = weight_background * weight_foreground * (mean_background - mean_foreground) ** 2
+        if variance > best_variance:
+            best_threshold, best_variance = threshold, variance
+    return best_threshold
+
+
+def _ink_thumbnail(image: Image.Image, lines_vertical: bool = False) -> Tuple[Image.Image, int]:
+    """Small binarized copy with ink as 255, plus the reduction factor used"""
+    factor = max(1, math.ceil(max(image.size) / ESTIMATE_DIMENSION))
+    thumbnail = image.reduce(factor) if factor > 1 else image
+    thumbnail = _convert(thumbnail, "L")
+    if lines_vertical:
+        thumbnail = thumbnail.transpose(Image.Transpose.ROTATE_90)
+
+    threshold = otsu_threshold(thumbnail.histogram())
+    return thumbnail.point([255 if value <= threshold else 0 for value in range(256)]), factor
+
+
+def _row_profile(ink: Image.Image) -> List[int]:
+    # Box-resizing to one column averages each row: its share of ink pixels
+    return list(ink.resize((1, ink.size[1]), Image.Resampling.BOX).getdata())
+
+
+def _ink_runs(profile: List[int], low: int = 3, high: int = 150) -> List[Tuple[int, int]]:
+    """(start, end) ranges of the profile that look like text
+
+    With the defaults, near-empty rows are gaps and near-solid rows are
+    shadows or page edges.
+    """
+    runs, start = [], None
+    for index, value in enumerate(profile):
+        if low <= value <= high:
+            if start is None:
+                start = index
+        elif start is not None:
+            runs.append((start, index))
+            start = None
+    if start is not None:
+        runs.append((start, len(profile)))
+    return runs
+
+
+def estimate_text_height(image: Image.Image, lines_vertical: bool = False) -> Optional[float]:
+    """Median height in pixels of the text lines in image, or None if unclear
+
+    Works on a small thumbnail: binarizes it, collapses each row to its ink
+    fraction and measures the runs of inked rows.
+    """
+    ink, factor = _ink_thumbnail(image, lines_vertical)
+    heights = [end - start for start, end in _ink_runs(_row_profile(ink)) if end - start >= 2]
+    if len(heights) < 3:
+        return None
+    return statistics.median(heights) * factor
+
+
+def _convert(image: Image.Image, mode: str) -> Image.Image:
+    """Convert straight to the output mode: grayscale never goes through RGB"""
+    if image.mode == mode:
+        return image
+    if mode == "L" and image.mode not in ("RGB", "RGBA", "L"):
+        image = image.convert("RGB")
+    return image.convert(mode)
+
+
+def _normalize_resolution(image: Image.Image, plan: PreprocessingPlan) -> Image.Image:
+    """Downscale so text lines come out at about plan.target_text_height pixels"""
+    # Rotation hasn't been applied yet, so 90/270 pages have vertical lines
+    text_height = estimate_text_height(image, lines_vertical=plan.rotation in (90, 270))
+    if not text_height:
+        return image
+
+    # Report the height in source pixels; earlier stages may have downscaled
+    region = plan.crop or (0, 0) + plan.source_size
+    plan.text_height = round(text_height * (region[2] - region[0]) / image.size[0], 1)
+
+    width, height = image.size
+    scale = plan.target_text_height / text_height
+    scale = min(MAX_NORMALIZE_SCALE, max(MIN_NORMALIZE_SCALE, scale))
+    if plan.max_dimension:
+        scale = min(scale, plan.max_dimension / max(width, height))
+    if abs(scale - 1) <= NORMALIZE_TOLERANCE:
+        return image
+
+    target = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return image.resize(target, Image.Resampling.BOX)
+
+
+def run_pipeline(image: Image.Image, plan: PreprocessingPlan) -> Image.Image:
+    """Apply a plan to a freshly opened (not yet loaded) image"""
+    decode_scale = _draft(image, plan)
+
+    if plan.crop:
+        if decode_scale != 1.0:
+            image = image.crop(tuple(round(c * decode_scale) for c in plan.crop))
+        else:
+            image = image.crop(plan.crop)
+
+    # Grayscale first so the resize only has one band to filter
+    if plan.output_mode == "L":
+        image = _convert(image, "L")
+
+    if plan.scale < 1:
+        width, height = image.size
+        remaining = plan.scale / decode_scale
+        target = (max(1, round(width * remaining)), max(1, round(height * remaining)))
+        if target[0] < width:
+            if image.mode not in ("L", "RGB", "RGBA"):
+                image = image.convert("RGB")
+            # Area averaging keeps thin strokes legible and is the cheapest filter
+            image = image.resize(target, Image.Resampling.BOX, reducing_gap=2.0)
+
+    image = _convert(image, plan.output_mode)
+
+    if plan.normalize_resolution:
+        image = _normalize_resolution(image, plan)
+
+    region = plan.crop or (0, 0) + plan.source_size
+    plan.applied_scale = round(image.size[0] / max(1, region[2] - region[0]), 4)
+
+    if plan.rotation:
+        image = image.transpose(_TRANSPOSE[plan.rotation])
+
+    if plan.enhance_contrast:
+        lut = _contrast_lut(image)
+        image = image.point(lut * len(image.getbands()))
+
+    if plan.binarize:
+        threshold = otsu_threshold(image.histogram())
+        image = image.point([0 if value <= threshold else 255 for value in range(256)])
+
+    return image
@@ -0,0 +1,113 @@
+import hashlib
+import io
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+from PIL import Image, features
+from ..config import settings
+
+
+MEDIA_TYPES = {"webp": "image/webp", "jpeg": "image/jpeg"}
+
+
+def preview_format(requested: Optional[str] = None) -> str:
+    fmt = (requested or settings.preview_format).lower()
+    if fmt == "jpg":
+        fmt = "jpeg"
+    if fmt not in MEDIA_TYPES or (fmt == "webp" and not features.check("webp")):
+        fmt = "jpeg"
+    return fmt
+
+
+def encode_preview(image: Image.Image, max_dimension: int, fmt: Optional[str] = None) -> bytes:
+    """Downscale to max_dimension and encode as a lossy WebP/JPEG thumbnail"""
+    image = image.copy()
+    image.thumbnail((max_dimension, max_dimension), Image.Resampling.BOX, reducing_gap=2.0)
+    if image.mode not in ("L", "RGB"):
+        image = image.convert("RGB")
+    buffer = io.BytesIO()
+    fmt = preview_format(fmt)
+    image.save(buffer, format=fmt.upper(), quality=settings.preview_quality)
+    return buffer.getvalue()
+
+
+class PreviewStore:
+    """Size-bounded LRU of preview masters and the renditions cut from them
+
+    Previews live in this process's memory only: with several API worker
+    processes, a preview is served only by the process that ran the OCR
+    (others answer 404, and the client can go on without it). Each preview
+    records the users it was handed to, since identical uploads from
+    different users share one id.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        # (preview_id, width, format) -> image bytes; width None is the master
+        self._items: "OrderedDict[Tuple[str, Optional[int], Optional[str]], bytes]" = OrderedDict()
+        # preview_id -> ids of the users whose OCR produced it
+        self._owners: Dict[str, Set[str]] = {}
+
+    @staticmethod
+    def make_id(cache_key: str) -> str:
+        return hashlib.sha256(cache_key.encode()).hexdigest()[:32]
+
+    def _put(self, key, data: bytes):
+        old = self._items.pop(key, None)
+        if old is not None:
+            self.size_bytes -= len(old)
+        if len(data) > self.max_bytes:
+            return
+        self._items[key] = data
+        self.size_bytes += len(data)
+        while self.size_bytes > self.max_bytes:
+            (preview_id, width, _), evicted = self._items.popitem(last=False)
+            self.size_bytes -= len(evicted)
+            if width is None:
+                self._owners.pop(preview_id, None)
+
+    def _get(self, key) -> Optional[bytes]:
+        data = self._items.get(key)
+        if data is not None:
+            self._items.move_to_end(key)
+        return data
+
+    def put(self, preview_id: str, master: bytes):
+        self._put((preview_id, None, None), master)
+
+    def __contains__(self, preview_id: str) -> bool:
+        return (preview_id, None, None) in self._items
+
+    def grant(self, preview_id: str, user_id: str):
+        if preview_id in self:
+            self._owners.setdefault(preview_id, set()).add(str(user_id))
+
+    def allowed(self, preview_id: str, user_id: str) -> bool:
+        return str(user_id) in self._owners.get(preview_id, ())
+
+    def get_cached(self, preview_id: str, width: int, fmt: str) -> Optional[bytes]:
+        return self._get((preview_id, width, fmt))
+
+    def get_master(self, preview_id: str) -> Optional[bytes]:
+        return self._get((preview_id, None, None))
+
+    def put_rendition(self, preview_id: str, width: int, fmt: str, data: bytes):
+        self._put((preview_id, width, fmt), data)
+
+    @staticmethod
+    def render(master: bytes, width: int, fmt: str) -> bytes:
+        """Resize a master to width (never up) and encode it (blocking)"""
+        with Image.open(io.BytesIO(master)) as image:
+            if image.width > width:
+                image.draft(image.mode, (width, width))
+                height = max(1, round(image.height * width / image.width))
+                image = image.resize((width, height), Image.Resampling.BOX)
+            elif image.format.lower() == fmt:
+                return master
+            return encode_preview(image, max(image.size), fmt)
+
+    def stats(self) -> Dict[str, int]:
+        return {"items": len(self._items), "size_bytes": self.size_bytes, "max_bytes": self.max_bytes}
+
+
+preview_store = PreviewStore(settings.preview_store_max_bytes)
@@ -0,0 +1,212 @@
+import hashlib
+import io
+import os
+import tempfile
+from typing import Callable, Iterable, Optional, Tuple, Union
+from fastapi import HTTPException, Request, UploadFile, status
+from fastapi.routing import APIRoute
+from PIL import Image
+from ..config import settings
+
+
+CHUNK_SIZE = 1024 * 1024
+
+# Room for the multipart boundaries, part headers and small form fields
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+# Leading bytes -> format, checked before anything is decoded
+_SIGNATURES = (
+    (b"\xff\xd8\xff", "jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+    (b"II*\x00", "tiff"),
+    (b"MM\x00*", "tiff"),
+    (b"BM", "bmp"),
+    (b"%PDF-", "pdf"),
+)
+IMAGE_FORMATS = ("jpeg", "png", "gif", "tiff", "bmp", "webp")
+
+
+def sniff_format(header: bytes) -> Optional[str]:
+    """Identify a file from its first bytes, ignoring the client's content type"""
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "webp"
+    for signature, fmt in _SIGNATURES:
+        if header.startswith(signature):
+            return fmt
+    return None
+
+
+class IngestedUpload:
+    """An upload read within limits: small bodies in memory, large ones on disk"""
+
+    def __init__(self, fmt: str, sha256: str, size: int, data: Optional[bytes] = None, path: Optional[str] = None):
+        self.format = fmt
+        self.sha256 = sha256
+        self.size = size
+        self.data = data
+        self.path = path
+        self.image_size: Optional[Tuple[int, int]] = None
+
+    @property
+    def source(self) -> Union[bytes, str]:
+        """What to hand the OCR workers: the bytes, or the spool file path"""
+        return self.data if self.data is not None else self.path
+
+    def read_bytes(self) -> bytes:
+        if self.data is not None:
+            return self.data
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def close(self):
+        if self.path is not None:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+            self.path = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _unsupported(allowed_formats: Iterable[str]) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        detail="File must be an image or a PDF" if "pdf" in allowed_formats else "File must be an image"
+    )
+
+
+def _too_large(detail: str) -> HTTPException:
+    return HTTPException(status_code=413, detail=detail)
+
+
+def body_limit(max_bytes: Callable[[], int]):
+    """Mark an upload endpoint with the largest file its request may carry"""
+    def decorator(endpoint):
+        endpoint.max_body_bytes = max_bytes
+        return endpoint
+    return decorator
+
+
+def check_content_length(request: Request, max_bytes: int):
+    """Reject a request whose declared Content-Length is over max_bytes"""
+    try:
+        length = int(request.headers.get("content-length", ""))
+    except ValueError:
+        return
+    if length > max_bytes + MULTIPART_OVERHEAD_BYTES:
+        raise _too_large(f"Request body is larger than {max_bytes} bytes")
+
+
+class UploadLimitRoute(APIRoute):
+    """Check a body_limit endpoint's Content-Length before the form is parsed
+
+    Starlette spools the whole multipart body before the endpoint runs, so
+    this turns a declared oversized upload away without reading it. Chunked
+    bodies and understated lengths are still caught by ingest_upload.
+    """
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        max_bytes = getattr(self.endpoint, "max_body_bytes", None)
+        if max_bytes is None:
+            return handler
+
+        async def limited_handler(request: Request):
+            check_content_length(request, max_bytes())
+            return await handler(request)
+        return limited_handler
+
+
+def _check_image_header(upload: IngestedUpload):
+    """Read the image header (not the pixels) and enforce the pixel limit"""
+    try:
+        with Image.open(io.BytesIO(upload.data) if upload.data is not None else upload.path) as image:
+            upload.image_size = image.size
+    except Image.DecompressionBombError:
+        raise _too_large("Image dimensions are too large")
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="File is not a readable image"
+        )
+
+    width, height = upload.image_size
+    if width * height > settings.max_image_pixels:
+        raise _too_large(
+            f"Image has {width * height} pixels; the limit is {settings.max_image_pixels}"
+        )
+
+
+async def ingest_upload(
+    file: UploadFile,
+    allowed_formats: Iterable[str] = IMAGE_FORMATS,
+    max_bytes: Optional[int] = None,
+    spool_bytes: Optional[int] = None
+) -> IngestedUpload:
+    """Stream an upload in chunks, sniffing, hashing and size-checking as it goes
+
+    Bodies over spool_bytes are written to a temp file, which the OCR
+    workers memory-map instead of receiving a copy. The caller must close()
+    the result.
+    """
+    max_bytes = settings.max_upload_bytes if max_bytes is None else max_bytes
+    spool_bytes = settings.upload_spool_bytes if spool_bytes is None else spool_bytes
+
+    hasher = hashlib.sha256()
+    buffer = bytearray()
+    spool = None
+    path = None
+    size = 0
+    fmt = None
+    try:
+        while chunk := await file.read(CHUNK_SIZE):
+            size += len(chunk)
+            if size > max_bytes:
+                raise _too_large(f"File is larger than {max_bytes} bytes")
+            hasher.update(chunk)
+
+            if spool is not None:
+                spool.write(chunk)
+                continue
+            buffer += chunk
+
+            if fmt is None and len(buffer) >= 16:
+                fmt = sniff_format(bytes(buffer[:16]))
+                if fmt not in allowed_formats:
+                    raise _unsupported(allowed_formats)
+            if len(buffer) > spool_bytes:
+                fd, path = tempfile.mkstemp(prefix="ocr-upload-")
+                spool = os.fdopen(fd, "wb")
+                spool.write(buffer)
+                buffer = bytearray()
+
+        if fmt is None:
+            fmt = sniff_format(bytes(buffer))
+            if fmt not in allowed_formats:
+                raise _unsupported(allowed_formats)
+    except BaseException:
+        if spool is not None:
+            spool.close()
+            os.unlink(path)
+        raise
+
+    if spool is not None:
+        spool.close()
+        upload = IngestedUpload(fmt, hasher.hexdigest(), size, path=path)
+    else:
+        upload = IngestedUpload(fmt, hasher.hexdigest(), size, data=bytes(buffer))
+
+    if fmt != "pdf":
+        try:
+            _check_image_header(upload)
+        except HTTPException:
+            upload.close()
+            raise
+    return upload
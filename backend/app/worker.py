@@ -0,0 +1,127 @@
+"""Standalone OCR worker: python -m app.worker
+
+Claims jobs submitted through /documents/jobs and runs them on the OCR
+worker pool, so OCR capacity can scale independently of API replicas.
+With IMAGE_STORAGE_ENABLED it also deletes stored images no document uses.
+"""
+import asyncio
+import logging
+import os
+import signal
+import socket
+
+from .config import settings
+from .database import connect_to_mongo, close_mongo_connection, db
+from .services.image_store import ImageStore
+from .services.ocr_jobs import OCRJobQueue
+from .services.ocr_pool import ocr_pool
+from .services.ocr_service import OCRService
+
+
+logger = logging.getLogger("app.worker")
+
+
+async def _pause(stop: asyncio.Event, seconds: float):
+    try:
+        await asyncio.wait_for(stop.wait(), seconds)
+    except asyncio.TimeoutError:
+        pass
+
+
+async def _run_slot(worker_id: str, stop: asyncio.Event):
+    while not stop.is_set():
+        # A failover or network blip must not take the worker down with it
+        try:
+            job = await OCRJobQueue.claim(db.database, worker_id)
+        except Exception as e:
+            logger.warning("Claiming a job failed: %s", e)
+            job = None
+        if job is None:
+            await _pause(stop, settings.ocr_job_poll_interval_seconds)
+            continue
+
+        logger.info("Processing job %s (attempt %d)", job["_id"], job["attempts"])
+        error, result, retry = None, None, False
+        try:
+            # Without a user_id no preview is linked; it would stay in this process anyway
+            result = await OCRService.extract_text_from_image(bytes(job["image"]), job.get("options"))
+        except Exception as e:
+            error = str(getattr(e, "detail", None) or e)
+            # Only a problem with the image itself (4xx) is final; a busy or
+            # restarted pool, a timeout or anything unexpected may pass
+            status_code = getattr(e, "status_code", None)
+            retry = not (status_code and 400 <= status_code < 500)
+            retry = retry and job["attempts"] < settings.ocr_job_max_attempts
+            logger.warning("Job %s failed%s: %s", job["_id"], ", will retry" if retry else "", error)
+
+        try:
+            if error is None:
+                await OCRJobQueue.complete(db.database, job["_id"], result)
+            elif retry:
+                backoff = settings.ocr_job_retry_backoff_seconds * 2 ** (job["attempts"] - 1)
+                await OCRJobQueue.release(db.database, job["_id"], worker_id, backoff, error)
+            else:
+                await OCRJobQueue.fail(db.database, job["_id"], error)
+        except Exception as e:
+            logger.warning("Recording job %s failed: %s; it will be retried", job["_id"], e)
+            try:
+                await OCRJobQueue.release(db.database, job["_id"], worker_id)
+            except Exception:
+                # The lease still runs out, which has the same effect later
+                pass
+            await _pause(stop, settings.ocr_job_poll_interval_seconds)
+
+
+async def _sweep_abandoned(stop: asyncio.Event):
+    while not stop.is_set():
+        try:
+            failed = await OCRJobQueue.fail_abandoned(db.database)
+        except Exception as e:
+            logger.warning("Sweeping abandoned jobs failed: %s", e)
+            failed = 0
+        if failed:
+            logger.warning("Marked %d abandoned jobs as failed", failed)
+        await _pause(stop, settings.ocr_job_lease_seconds)
+
+
+async def _sweep_unused_images(stop: asyncio.Event):
+    while not stop.is_set():
+        try:
+            removed = await ImageStore.remove_unused(db.database, settings.image_storage_orphan_grace_seconds)
+        except Exception as e:
+            logger.warning("Sweeping unused images failed: %s", e)
+            removed = 0
+        if removed:
+            logger.info("Removed %d stored images no document uses", removed)
+        await _pause(stop, settings.image_storage_sweep_interval_seconds)
+
+
+async def main():
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    await connect_to_mongo()
+    ocr_pool.start(initializer=OCRService.warm_up)
+    await ocr_pool.warm()
+
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    logger.info("OCR worker %s started with %d slots", worker_id, ocr_pool.workers)
+    try:
+        sweeps = [_sweep_abandoned(stop)]
+        if settings.image_storage_enabled:
+            sweeps.append(_sweep_unused_images(stop))
+        await asyncio.gather(
+            *sweeps,
+            *(_run_slot(worker_id, stop) for _ in range(ocr_pool.workers))
+        )
+    finally:
+        ocr_pool.shutdown()
+        await close_mongo_connection()
+        logger.info("OCR worker %s stopped", worker_id)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    asyncio.run(main())
@@ -0,0 +1 @@
+# Benchmarks are run from the backend directory, e.g. `python -m benchmarks.preprocess`
@@ -0,0 +1,91 @@
+"""Fixed corpus of synthetic text images for the benchmark suite
+
+Every image is drawn locally from a seed, so each run, on any machine, works
+on byte-identical input without shipping sample scans.
+"""
+import io
+import random
+from typing import Any, Dict, List, NamedTuple, Tuple
+
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+from .preprocess import PHONE_PHOTO_SIZE, make_phone_photo
+
+
+WORDS = (
+    "the of and to in is that for it as was with be by on not he this are or his from at "
+    "lecture notes integral theorem proof derivative matrix vector function limit series "
+    "chapter exercise answer question example definition result method analysis data"
+).split()
+
+
+class CorpusImage(NamedTuple):
+    name: str
+    data: bytes
+    size: Tuple[int, int]
+    options: Dict[str, Any]
+
+
+def _encode(image: Image.Image, fmt: str) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt, **({"quality": 90} if fmt == "JPEG" else {}))
+    return buffer.getvalue()
+
+
+def make_printed_page(size: Tuple[int, int], seed: int, font_size: int = 28, fmt: str = "PNG") -> bytes:
+    """Black typed lines on white, like a flatbed scan"""
+    rng = random.Random(seed)
+    image = Image.new("L", size, 255)
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default(size=font_size)
+    margin, line_height = size[0] // 12, int(font_size * 1.6)
+    for y in range(margin, size[1] - margin - line_height, line_height):
+        line = []
+        while draw.textlength(" ".join(line), font=font) < size[0] - 2 * margin - 12 * font_size:
+            line.append(rng.choice(WORDS))
+        draw.text((margin, y), " ".join(line), fill=0, font=font)
+    return _encode(image, fmt)
+
+
+def make_handwritten_note(size: Tuple[int, int], seed: int, font_size: int = 44, fmt: str = "JPEG") -> bytes:
+    """Ink-coloured lines with per-letter jitter and slant on off-white, ruled paper"""
+    rng = random.Random(seed)
+    image = Image.new("RGB", size, (246, 243, 232))
+    draw = ImageDraw.Draw(image)
+    line_height = int(font_size * 1.9)
+    for y in range(line_height, size[1], line_height):
+        draw.line([(0, y + font_size + 6), (size[0], y + font_size + 6)], fill=(170, 190, 220), width=2)
+
+    fonts = [ImageFont.load_default(size=font_size + delta) for delta in (-4, 0, 4)]
+    ink = (25, 35, 110)
+    for y in range(line_height, size[1] - line_height, line_height):
+        x = size[0] // 14
+        slant = rng.uniform(-0.03, 0.03)
+        while x < size[0] - 8 * font_size:
+            for letter in rng.choice(WORDS):
+                font = rng.choice(fonts)
+                baseline = y + int(slant * x) + rng.randint(-3, 3)
+                draw.text((x, baseline), letter, fill=ink, font=font)
+                x += int(draw.textlength(letter, font=font)) + rng.randint(-2, 3)
+            x += font_size // 2 + rng.randint(0, font_size // 2)
+    image = image.rotate(rng.uniform(-1.5, 1.5), resample=Image.BICUBIC, fillcolor=(246, 243, 232))
+    return _encode(image.filter(ImageFilter.GaussianBlur(0.8)), fmt)
+
+
+# name -> (builder, size, preprocessing options sent with it)
+CORPUS = {
+    "receipt": (lambda size, seed: make_printed_page(size, seed, font_size=22), (600, 1100), {}),
+    "note": (make_handwritten_note, (1600, 1200), {"grayscale": True, "enhance_contrast": True}),
+    "page": (make_printed_page, (1240, 1754), {"grayscale": True}),
+    "photo": (lambda size, seed: make_phone_photo(size, seed), PHONE_PHOTO_SIZE, {"rotation": 90, "grayscale": True}),
+}
+
+
+def build_corpus(seed: int = 0, names: List[str] = None) -> List[CorpusImage]:
+    """The corpus images, in a fixed order; names picks a subset"""
+    images = []
+    for index, (name, (builder, size, options)) in enumerate(CORPUS.items()):
+        if names and name not in names:
+            continue
+        images.append(CorpusImage(name, builder(size, seed + index), size, options))
+    return images
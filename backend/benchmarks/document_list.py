@@ -0,0 +1,91 @@
+"""Time encoding a 10k-document listing: validated models vs trusted rows.
+
+    cd backend
+    python -m benchmarks.document_list --documents 10000 --repeat 5
+
+"before" is what a response_model=List[DocumentSummary] handler did: build
+a model per MongoDB document, validate again against the response model,
+dump to JSON-able data and encode with the stdlib JSON encoder. "after"
+encodes the raw rows with FastJSONResponse. Both outputs are checked to be
+the same JSON.
+"""
+import argparse
+import gzip
+import json
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List
+
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.models import DocumentSummary
+from app.responses import FastJSONResponse, document_row
+
+
+def make_documents(count: int, text_length: int) -> List[Dict[str, Any]]:
+    rng = random.Random(0)
+    words = ["lecture", "notes", "integral", "theorem", "proof", "handwritten", "page", "the", "of", "and"]
+    user_id = ObjectId()
+    started = datetime(2024, 1, 1)
+    docs = []
+    for i in range(count):
+        text = " ".join(rng.choice(words) for _ in range(text_length // 6))[:text_length]
+        docs.append({
+            "_id": ObjectId(),
+            "user_id": user_id,
+            "original_text": text,
+            "corrected_text": text.upper() if i % 3 == 0 else None,
+            "created_at": started + timedelta(minutes=i, microseconds=i * 1000),
+            "truncated": False,
+        })
+    return docs
+
+
+def before(docs: List[Dict[str, Any]], adapter: TypeAdapter) -> bytes:
+    models = [DocumentSummary(**doc) for doc in docs]
+    validated = adapter.validate_python(models)
+    content = adapter.dump_python(validated, mode="json", by_alias=True)
+    return JSONResponse(content).body
+
+
+def after(docs: List[Dict[str, Any]]) -> bytes:
+    return FastJSONResponse([document_row(doc, summary=True) for doc in docs]).body
+
+
+def time_ms(fn: Callable[[], Any], repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=10000)
+    parser.add_argument("--text-length", type=int, default=200, help="characters per text (200 = summary view)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    docs = make_documents(args.documents, args.text_length)
+    adapter = TypeAdapter(List[DocumentSummary])
+
+    old_body, new_body = before(docs, adapter), after(docs)
+    assert json.loads(old_body) == json.loads(new_body), "outputs differ"
+
+    old_ms = time_ms(lambda: before(docs, adapter), args.repeat)
+    new_ms = time_ms(lambda: after(docs), args.repeat)
+    print(f"{args.documents} documents, {args.text_length}-character texts, median of {args.repeat}")
+    print(f"{'':<8}{'ms':>10}{'bytes':>12}{'gzip bytes':>12}")
+    print(f"{'before':<8}{old_ms:>10.1f}{len(old_body):>12}{len(gzip.compress(old_body, 6)):>12}")
+    print(f"{'after':<8}{new_ms:>10.1f}{len(new_body):>12}{len(gzip.compress(new_body, 6)):>12}")
+    print(f"speedup {old_ms / new_ms:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Check that a burst of logins no longer stalls other requests.
+
+    cd backend
+    python -m benchmarks.login_load --logins 40 --probes 200
+    python -m benchmarks.login_load --inline   # old behaviour, bcrypt on the event loop
+
+Fires concurrent POST /auth/login requests at the app in-process while a
+second client keeps calling GET /, and reports the latency of both. MongoDB
+is replaced by a dict-backed users collection so only bcrypt and the event
+loop are measured.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List, Optional
+
+import httpx
+
+from app import auth
+from app.database import get_database
+from app.main import app
+from app.services.hashing_pool import hashing_pool
+
+from .memory_db import MemoryCollection, MemoryDatabase
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def summary(samples: List[float]) -> str:
+    return (
+        f"n={len(samples):<4} p50={statistics.median(samples):8.1f}ms "
+        f"p95={percentile(samples, 95):8.1f}ms max={max(samples):8.1f}ms"
+    )
+
+
+async def timed(client: httpx.AsyncClient, method: str, url: str, samples: List[float],
+                started: Optional[float] = None, **kwargs) -> int:
+    started = started or time.perf_counter()
+    response = await client.request(method, url, **kwargs)
+    samples.append((time.perf_counter() - started) * 1000)
+    return response.status_code
+
+
+async def run(args) -> None:
+    password = "correct horse battery staple"
+    hashed = auth.get_password_hash(password)
+    users = MemoryCollection([
+        {"_id": i, "email": f"user{i}@example.com", "username": f"user{i}", "hashed_password": hashed}
+        for i in range(args.logins)
+    ])
+    app.dependency_overrides[get_database] = lambda: MemoryDatabase(users=users)
+
+    if args.inline:
+        async def run_inline(fn, *fn_args):
+            return fn(*fn_args)
+        hashing_pool.run = run_inline
+    else:
+        hashing_pool.start()
+
+    transport = httpx.ASGITransport(app=app)
+    login_ms: List[float] = []
+    probe_ms: List[float] = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def probes():
+            # Probes are due on a fixed schedule and timed from when they were
+            # due, so time spent waiting for a blocked event loop is counted
+            first = time.perf_counter()
+            for i in range(args.probes):
+                due = first + i * args.probe_interval / 1000
+                await asyncio.sleep(max(0.0, due - time.perf_counter()))
+                await timed(client, "GET", "/", probe_ms, started=due)
+
+        logins = [
+            timed(client, "POST", "/auth/login", login_ms,
+                  json={"email": f"user{i}@example.com", "password": password})
+            for i in range(args.logins)
+        ]
+        started = time.perf_counter()
+        results = await asyncio.gather(probes(), *logins)
+        elapsed = time.perf_counter() - started
+
+    statuses = {code: results[1:].count(code) for code in set(results[1:])}
+    mode = "inline (event loop)" if args.inline else f"hashing pool ({hashing_pool.workers} threads)"
+    print(f"bcrypt rounds={auth.settings.bcrypt_rounds}, {mode}, {elapsed:.2f}s total")
+    print(f"login  {summary(login_ms)}  statuses={statuses}")
+    print(f"GET /  {summary(probe_ms)}")
+    hashing_pool.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--probes", type=int, default=200)
+    parser.add_argument("--probe-interval", type=float, default=5, help="ms between probe requests")
+    parser.add_argument("--inline", action="store_true", help="hash on the event loop, as before")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
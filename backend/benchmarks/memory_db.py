@@ -0,0 +1,184 @@
+"""Dict-backed stand-in for the Motor collections the benchmarked endpoints use
+
+Covers the queries, projections and updates those endpoints actually send
+(equality, comparison operators, $or, the summary view's expression
+projection, $set), so load tests exercise the real handlers without a
+MongoDB server. It is not a general MongoDB emulator.
+"""
+import copy
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, List, Optional
+
+from bson import ObjectId
+
+
+_COMPARISONS = {
+    "$eq": lambda a, b: a == b,
+    "$ne": lambda a, b: a != b,
+    "$lt": lambda a, b: a is not None and a < b,
+    "$lte": lambda a, b: a is not None and a <= b,
+    "$gt": lambda a, b: a is not None and a > b,
+    "$gte": lambda a, b: a is not None and a >= b,
+    "$in": lambda a, b: a in b,
+}
+
+
+def matches(doc: Dict[str, Any], query: Dict[str, Any]) -> bool:
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(matches(doc, sub) for sub in condition):
+                return False
+            continue
+        value = doc.get(key)
+        if isinstance(condition, dict) and condition and all(op.startswith("$") for op in condition):
+            if not all(_COMPARISONS[op](value, operand) for op, operand in condition.items()):
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+def _type_name(value: Any) -> str:
+    if value is None:
+        return "null"
+    return {str: "string", ObjectId: "objectId", bool: "bool", int: "int", float: "double"}.get(type(value), "object")
+
+
+def evaluate(doc: Dict[str, Any], expression: Any) -> Any:
+    """The handful of aggregation expressions our projections use"""
+    if isinstance(expression, str) and expression.startswith("$"):
+        return doc.get(expression[1:])
+    if not isinstance(expression, dict):
+        return expression
+    (op, args), = expression.items()
+    if op == "$substrCP":
+        text, start, length = (evaluate(doc, a) for a in args)
+        return (text or "")[start:start + length]
+    values = [evaluate(doc, a) for a in args] if isinstance(args, list) else evaluate(doc, args)
+    if op == "$cond":
+        return values[1] if values[0] else values[2]
+    if op == "$eq":
+        return values[0] == values[1]
+    if op == "$gt":
+        return values[0] > values[1]
+    if op == "$or":
+        return any(values)
+    if op == "$ifNull":
+        return values[0] if values[0] is not None else values[1]
+    if op == "$type":
+        return _type_name(values)
+    if op == "$strLenCP":
+        return len(values)
+    raise NotImplementedError(f"{op} is not supported by the benchmark stand-in")
+
+
+def project(doc: Dict[str, Any], projection: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    if not projection:
+        return copy.copy(doc)
+    row = {"_id": doc["_id"]}
+    for field, spec in projection.items():
+        if spec in (1, True):
+            if field in doc:
+                row[field] = doc[field]
+        elif spec not in (0, False):
+            row[field] = evaluate(doc, spec)
+    return row
+
+
+class MemoryCursor:
+    def __init__(self, docs: Iterable[Dict[str, Any]], projection: Optional[Dict[str, Any]]):
+        self._docs = list(docs)
+        self._projection = projection
+        self._skip = 0
+        self._limit = 0
+
+    def sort(self, keys, direction: int = None) -> "MemoryCursor":
+        if isinstance(keys, str):
+            keys = [(keys, direction or 1)]
+        # Stable sorts from the last key to the first give a compound order
+        for field, order in reversed(keys):
+            self._docs.sort(key=lambda doc: doc.get(field), reverse=order == -1)
+        return self
+
+    def skip(self, count: int) -> "MemoryCursor":
+        self._skip = count
+        return self
+
+    def limit(self, count: int) -> "MemoryCursor":
+        self._limit = count
+        return self
+
+    def _selected(self) -> List[Dict[str, Any]]:
+        docs = self._docs[self._skip:]
+        if self._limit:
+            docs = docs[:self._limit]
+        return [project(doc, self._projection) for doc in docs]
+
+    async def to_list(self, length: Optional[int] = None) -> List[Dict[str, Any]]:
+        docs = self._selected()
+        return docs[:length] if length else docs
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self._selected():
+            yield doc
+
+
+class MemoryCollection:
+    def __init__(self, docs: Iterable[Dict[str, Any]] = ()):
+        self.docs: Dict[Any, Dict[str, Any]] = {}
+        for doc in docs:
+            self._store(doc)
+
+    def _store(self, doc: Dict[str, Any]) -> Any:
+        doc.setdefault("_id", ObjectId())
+        self.docs[doc["_id"]] = doc
+        return doc["_id"]
+
+    def _first(self, query: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if set(query) == {"_id"} and not isinstance(query["_id"], dict):
+            return self.docs.get(query["_id"])
+        return next((doc for doc in self.docs.values() if matches(doc, query)), None)
+
+    def find(self, query: Dict[str, Any] = None, projection: Dict[str, Any] = None) -> MemoryCursor:
+        query = query or {}
+        return MemoryCursor((doc for doc in self.docs.values() if matches(doc, query)), projection)
+
+    async def find_one(self, query: Dict[str, Any], projection: Dict[str, Any] = None) -> Optional[Dict[str, Any]]:
+        doc = self._first(query)
+        return project(doc, projection) if doc is not None else None
+
+    async def insert_one(self, doc: Dict[str, Any]):
+        return SimpleNamespace(inserted_id=self._store(doc))
+
+    async def insert_many(self, docs: List[Dict[str, Any]], ordered: bool = True):
+        return SimpleNamespace(inserted_ids=[self._store(doc) for doc in docs])
+
+    async def update_one(self, query: Dict[str, Any], update: Dict[str, Any]):
+        doc = self._first(query)
+        if doc is not None:
+            doc.update(update.get("$set", {}))
+        return SimpleNamespace(matched_count=int(doc is not None), modified_count=int(doc is not None))
+
+    async def delete_one(self, query: Dict[str, Any]):
+        doc = self._first(query)
+        if doc is not None:
+            del self.docs[doc["_id"]]
+        return SimpleNamespace(deleted_count=int(doc is not None))
+
+
+class MemoryDatabase:
+    """Collections are created on first access, like Motor's"""
+
+    def __init__(self, **collections: MemoryCollection):
+        self._collections = dict(collections)
+
+    def __getattr__(self, name: str) -> MemoryCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self._collections.setdefault(name, MemoryCollection())
+
+    def __getitem__(self, name: str) -> MemoryCollection:
+        return getattr(self, name)
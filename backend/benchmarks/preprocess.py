@@ -0,0 +1,120 @@
+"""Compare the legacy and planned preprocessing pipelines on 12MP phone photos.
+
+    cd backend
+    python -m benchmarks.preprocess --repeat 5
+
+Times cover decode + preprocessing, which is what a request pays before
+tesseract runs.
+"""
+import argparse
+import io
+import random
+import statistics
+import time
+from typing import Any, Callable, Dict
+
+from PIL import Image, ImageDraw, ImageEnhance, ImageFilter
+
+from app.services.preprocessing import plan_preprocessing, run_pipeline
+
+
+PHONE_PHOTO_SIZE = (4032, 3024)  # 12MP
+
+OPTION_SETS = {
+    "none": {},
+    "rotate": {"rotation": 90},
+    "grayscale+contrast": {"grayscale": True, "enhance_contrast": True},
+    "crop+rotate+grayscale": {
+        "rotation": 90,
+        "crop": {"x": 200, "y": 300, "width": 2400, "height": 1600},
+        "grayscale": True,
+    },
+    "everything": {
+        "rotation": 270,
+        "crop": {"x": 100, "y": 100, "width": 2800, "height": 3800},
+        "grayscale": True,
+        "enhance_contrast": True,
+    },
+}
+
+
+def make_phone_photo(size=PHONE_PHOTO_SIZE, seed: int = 0) -> bytes:
+    """A JPEG of lines of text on slightly uneven paper"""
+    rng = random.Random(seed)
+    image = Image.new("RGB", size, (232, 228, 215))
+    draw = ImageDraw.Draw(image)
+    for y in range(120, size[1] - 120, 90):
+        x = 150
+        while x < size[0] - 300:
+            word = "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(2, 9)))
+            draw.text((x, y), word, fill=(30, 30, 60), font_size=60)
+            x += 40 * len(word) + rng.randint(30, 80)
+    image = image.filter(ImageFilter.GaussianBlur(1))
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def legacy_preprocess(image_bytes: bytes, options: Dict[str, Any]) -> Image.Image:
+    """The pipeline as it was before the planned rewrite"""
+    image = Image.open(io.BytesIO(image_bytes))
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    if not options:
+        image.load()
+        return image
+
+    processed_image = image.copy()
+    rotation = options.get('rotation', 0)
+    if rotation == 90:
+        processed_image = processed_image.rotate(-90, expand=True)
+    elif rotation == 180:
+        processed_image = processed_image.rotate(180, expand=True)
+    elif rotation == 270:
+        processed_image = processed_image.rotate(90, expand=True)
+    if options.get('crop'):
+        crop = options['crop']
+        processed_image = processed_image.crop(
+            (crop['x'], crop['y'], crop['x'] + crop['width'], crop['y'] + crop['height'])
+        )
+    if options.get('grayscale', False):
+        processed_image = processed_image.convert('L')
+    if options.get('enhance_contrast', False):
+        processed_image = ImageEnhance.Contrast(processed_image).enhance(1.5)
+    return processed_image
+
+
+def planned_preprocess(image_bytes: bytes, options: Dict[str, Any], max_dimension: int = 0) -> Image.Image:
+    image = Image.open(io.BytesIO(image_bytes))
+    processed = run_pipeline(image, plan_preprocessing(image.size, options, max_dimension))
+    processed.load()
+    return processed
+
+
+def time_ms(fn: Callable[[], Any], repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-dimension", type=int, default=0,
+                        help="also downscale in the planned pipeline (0 = off, like legacy)")
+    args = parser.parse_args()
+
+    photo = make_phone_photo()
+    print(f"{PHONE_PHOTO_SIZE[0]}x{PHONE_PHOTO_SIZE[1]} JPEG, {len(photo) / 1e6:.1f}MB, median of {args.repeat}")
+    print(f"{'options':<24}{'legacy ms':>12}{'planned ms':>12}{'speedup':>10}")
+    for name, options in OPTION_SETS.items():
+        legacy = time_ms(lambda: legacy_preprocess(photo, options), args.repeat)
+        planned = time_ms(lambda: planned_preprocess(photo, options, args.max_dimension), args.repeat)
+        print(f"{name:<24}{legacy:>12.1f}{planned:>12.1f}{legacy / planned:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Latency summaries, JSON reports and comparison against a saved baseline"""
+import json
+import math
+import os
+import platform
+import subprocess
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import PIL
+
+
+# Compared against the baseline; throughput regresses when it goes down
+LATENCY_KEYS = ("p50_ms", "p95_ms", "p99_ms")
+THROUGHPUT_KEY = "throughput_per_s"
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Linear interpolation between closest ranks, like numpy's default"""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    rank = (len(ordered) - 1) * pct / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(samples_ms: List[float], elapsed_s: float, errors: int = 0, **extra: Any) -> Dict[str, Any]:
+    """Throughput and latency percentiles for one benchmark"""
+    count = len(samples_ms)
+    return {
+        "count": count,
+        "errors": errors,
+        THROUGHPUT_KEY: round(count / elapsed_s, 2) if elapsed_s > 0 else 0.0,
+        "mean_ms": round(sum(samples_ms) / count, 3) if count else 0.0,
+        **{key: round(percentile(samples_ms, int(key[1:3])), 3) for key in LATENCY_KEYS},
+        "max_ms": round(max(samples_ms), 3) if count else 0.0,
+        **extra,
+    }
+
+
+def skipped(reason: str) -> Dict[str, Any]:
+    return {"skipped": reason}
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment() -> Dict[str, Any]:
+    """What a result depends on besides the code, to judge whether two reports compare"""
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "pillow": PIL.__version__,
+    }
+
+
+def print_results(results: Dict[str, Dict[str, Any]]):
+    print(f"{'benchmark':<34}{'n':>6}{'err':>5}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, result in results.items():
+        if "skipped" in result:
+            print(f"{name:<34}  skipped: {result['skipped']}")
+            continue
+        print(
+            f"{name:<34}{result['count']:>6}{result['errors']:>5}{result[THROUGHPUT_KEY]:>10.1f}"
+            f"{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+        )
+
+
+def write_report(path: str, report: Dict[str, Any]):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def load_report(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Print the change against a baseline report; returns the regressions
+
+    A regression is a latency percentile more than threshold (a fraction)
+    above the baseline, or throughput more than threshold below it.
+    Benchmarks missing or skipped on either side are not compared.
+    """
+    regressions = []
+    base_results = baseline.get("results", {})
+    print(f"\nagainst baseline {baseline.get('environment', {}).get('commit') or '?'} (threshold {threshold:.0%})")
+    for name, result in results.items():
+        base = base_results.get(name)
+        if base is None or "skipped" in base or "skipped" in result:
+            continue
+        changes = []
+        for key in LATENCY_KEYS + (THROUGHPUT_KEY,):
+            old, new = base.get(key), result.get(key)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = change < -threshold if key == THROUGHPUT_KEY else change > threshold
+            changes.append(f"{key.split('_')[0]} {change:+.0%}{' !' if worse else ''}")
+            if worse:
+                regressions.append(f"{name} {key}: {old} -> {new}")
+        print(f"{name:<34}{'  '.join(changes)}")
+    return regressions
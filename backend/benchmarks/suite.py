@@ -0,0 +1,313 @@
+"""Reproducible benchmark and load-test suite for the OCR engine and the API.
+
+    cd backend
+    python -m benchmarks.suite --output baseline.json
+    python -m benchmarks.suite --baseline baseline.json    # exit status 1 on a regression
+    python -m benchmarks.suite --only micro --repeat 20
+    python -m benchmarks.suite --ocr-engine null           # API load without tesseract
+
+Micro-benchmarks time OCRService.preprocess_image, image_to_base64 and the
+configured OCR engine on the generated corpus in corpus.py. With an engine
+that has its own layout analysis they also time region_parallel OCR and
+check that it reads the same words as whole-page OCR; a mismatch fails the
+run. Load tests send
+concurrent requests to /auth/login, /documents/upload-image and /documents/
+through an in-process ASGI client, with MongoDB replaced by the stand-in in
+memory_db, so everything runs offline on one machine with no server or
+database. Each result has throughput and p50/p95/p99 latency; --output saves
+them as JSON and --baseline compares a run against a saved report.
+
+Rate limiting and the OCR result cache are turned off for the run (--ocr-cache
+turns the cache back on) so every upload reaches the engine. Numbers are only
+comparable between runs on the same machine; the report records its
+environment to make that easy to check.
+"""
+import argparse
+import asyncio
+import io
+import itertools
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+from PIL import Image
+
+from app import auth
+from app.config import settings
+from app.database import get_database
+from app.main import app
+from app.services import ocr_service
+from app.services.hashing_pool import hashing_pool
+from app.services.ocr_pool import ocr_pool
+from app.services.ocr_service import OCREngine, OCRService, get_engine
+
+from .corpus import WORDS, CorpusImage, build_corpus
+from .memory_db import MemoryCollection, MemoryDatabase
+from .report import compare, environment, load_report, print_results, skipped, summarize, write_report
+
+
+PASSWORD = "correct horse battery staple"
+
+
+class NullEngine(OCREngine):
+    """Returns fixed text at once, so API load can be measured without tesseract"""
+    name = "null"
+
+    def image_to_string(self, image: Image.Image, single_block: bool = False, timeout: Optional[float] = None) -> str:
+        return "benchmark"
+
+
+# Micro-benchmarks
+
+def time_calls(fn: Callable[[], Any], repeat: int, warmup: int = 1) -> Dict[str, Any]:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        call_started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - call_started) * 1000)
+    return summarize(samples, time.perf_counter() - started)
+
+
+def preprocess(image: CorpusImage) -> Image.Image:
+    # Decoding is lazy, so this includes it, as it does for a request
+    processed = OCRService.preprocess_image(Image.open(io.BytesIO(image.data)), image.options)
+    processed.load()
+    return processed
+
+
+def ocr_unavailable(engine_name: str) -> Optional[str]:
+    if engine_name == "null":
+        return "--ocr-engine null"
+    try:
+        get_engine().warm_up()
+    except Exception as e:
+        return f"OCR engine unavailable: {e}"
+    return None
+
+
+def region_text(image: CorpusImage, target_regions: int) -> str:
+    """What region_parallel recognizes, with the regions run here one after another"""
+    result = OCRService.process_layout(image.data, image.options, target_regions)
+    if not result["regions"]:
+        return result["extracted_text"]
+    texts = (OCRService.recognize_region(region) for region in result["regions"])
+    return "\n\n".join(text for text in texts if text)
+
+
+def run_regions(image: CorpusImage, args) -> Dict[str, Any]:
+    whole = OCRService.process_image(image.data, image.options)["extracted_text"]
+    matches = region_text(image, args.regions).split() == whole.split()
+    return {**time_calls(lambda: region_text(image, args.regions), args.ocr_repeat), "matches_whole_page": matches}
+
+
+def run_micro(corpus: List[CorpusImage], args) -> Dict[str, Dict[str, Any]]:
+    results = {}
+    unavailable = ocr_unavailable(args.ocr_engine)
+    if not unavailable and not get_engine().has_layout:
+        regions_unavailable = f"{get_engine().name} has no layout analysis; region_parallel reads the page whole"
+    else:
+        regions_unavailable = unavailable
+    for image in corpus:
+        processed = preprocess(image)
+        results[f"preprocess_image/{image.name}"] = time_calls(lambda: preprocess(image), args.repeat)
+        results[f"image_to_base64/{image.name}"] = time_calls(
+            lambda: OCRService.image_to_base64(processed), args.repeat
+        )
+        results[f"ocr/{image.name}"] = skipped(unavailable) if unavailable else time_calls(
+            lambda: get_engine().image_to_string(processed), args.ocr_repeat
+        )
+        results[f"ocr-regions/{image.name}"] = (
+            skipped(regions_unavailable) if regions_unavailable else run_regions(image, args)
+        )
+    return results
+
+
+# API load tests
+
+def seed_database(users: int, documents_per_user: int, seed: int = 0) -> MemoryDatabase:
+    rng = random.Random(seed)
+    hashed = auth.get_password_hash(PASSWORD)
+    user_docs, documents = [], []
+    started = datetime(2024, 1, 1)
+    for i in range(users):
+        user = {
+            "email": f"bench{i}@example.com",
+            "username": f"bench{i}",
+            "hashed_password": hashed,
+            "created_at": started,
+        }
+        user_docs.append(user)
+    user_collection = MemoryCollection(user_docs)
+    for user in user_docs:
+        for n in range(documents_per_user):
+            text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 400)))
+            documents.append({
+                "user_id": user["_id"],
+                "original_text": text,
+                "corrected_text": text.capitalize() if n % 3 == 0 else None,
+                "created_at": started + timedelta(minutes=n),
+            })
+    return MemoryDatabase(users=user_collection, documents=MemoryCollection(documents))
+
+
+async def load(send: Callable[[int], Awaitable[httpx.Response]], total: int, concurrency: int,
+               warmup: int = 0) -> Dict[str, Any]:
+    """Closed-loop load: concurrency clients each send their next request as soon as one returns"""
+    for i in range(warmup):
+        await send(i)
+
+    counter = itertools.count()
+    samples: List[float] = []
+    errors = 0
+    statuses: Dict[str, int] = {}
+
+    async def client():
+        nonlocal errors
+        while (i := next(counter)) < total:
+            started = time.perf_counter()
+            try:
+                code = str((await send(i)).status_code)
+            except httpx.HTTPError as e:
+                code = type(e).__name__
+            samples.append((time.perf_counter() - started) * 1000)
+            statuses[code] = statuses.get(code, 0) + 1
+            if not code.startswith("2"):
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return summarize(samples, time.perf_counter() - started, errors, concurrency=concurrency, statuses=statuses)
+
+
+async def run_api(corpus: List[CorpusImage], args) -> Dict[str, Dict[str, Any]]:
+    db = seed_database(args.users, args.documents)
+    app.dependency_overrides[get_database] = lambda: db
+    users = list(db.users.docs.values())
+    tokens = [auth.create_access_token({"sub": str(user["_id"])}) for user in users]
+
+    def headers(i: int) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {tokens[i % len(tokens)]}"}
+
+    uploads = [
+        (f"{image.name}.{Image.open(io.BytesIO(image.data)).format.lower()}", image)
+        for image in corpus if image.name in args.upload_images
+    ]
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        results["api/login"] = await load(
+            lambda i: client.post("/auth/login", json={"email": users[i % len(users)]["email"], "password": PASSWORD}),
+            args.logins, args.concurrency, warmup=1
+        )
+
+        for view in ("full", "summary"):
+            results[f"api/documents-list/{view}"] = await load(
+                lambda i: client.get("/documents/", params={"view": view}, headers=headers(i)),
+                args.requests, args.concurrency, warmup=args.concurrency
+            )
+
+        unavailable = ocr_unavailable(args.ocr_engine) if args.ocr_engine != "null" else None
+        if unavailable or not uploads:
+            results["api/upload-image"] = skipped(unavailable or "no --upload-images")
+        else:
+            ocr_pool.start(initializer=OCRService.warm_up)
+            await ocr_pool.warm()
+
+            def upload(i: int):
+                filename, image = uploads[i % len(uploads)]
+                return client.post(
+                    "/documents/upload-image",
+                    files={"file": (filename, image.data)},
+                    data={"preprocessing_options": json.dumps(image.options)} if image.options else None,
+                    headers=headers(i),
+                )
+
+            results["api/upload-image"] = await load(upload, args.uploads, args.concurrency, warmup=len(uploads))
+
+    app.dependency_overrides.pop(get_database, None)
+    return results
+
+
+def configure(args):
+    # Measure the work itself rather than the limiter and the cache
+    settings.ocr_rate_limit_enabled = False
+    settings.ocr_cache_enabled = args.ocr_cache
+    if args.ocr_engine == "null":
+        # The engine is swapped in this process, so the pool has to run here too
+        settings.ocr_executor = "thread"
+        ocr_service._engine = NullEngine()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--only", choices=["micro", "api"], help="run one half of the suite")
+    parser.add_argument("--corpus", nargs="+", help="corpus images to use (default: all)")
+    parser.add_argument("--seed", type=int, default=0, help="corpus seed")
+    parser.add_argument("--repeat", type=int, default=10, help="calls per micro-benchmark")
+    parser.add_argument("--ocr-repeat", type=int, default=3, help="calls per OCR micro-benchmark")
+    parser.add_argument("--regions", type=int, default=8, help="regions asked of the layout in ocr-regions")
+    parser.add_argument("--ocr-engine", choices=["configured", "null"], default="configured",
+                        help="null answers instantly, to load-test the API without tesseract")
+    parser.add_argument("--ocr-cache", action="store_true", help="keep the OCR result cache on")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent clients in load tests")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--documents", type=int, default=200, help="stored documents per user")
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--requests", type=int, default=400, help="requests per listing load test")
+    parser.add_argument("--uploads", type=int, default=30)
+    parser.add_argument("--upload-images", nargs="+", default=["receipt", "note", "page"])
+    parser.add_argument("--output", help="write the report as JSON")
+    parser.add_argument("--baseline", help="compare against a saved JSON report")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="fractional change counted as a regression (default 0.15)")
+    args = parser.parse_args()
+
+    configure(args)
+    corpus = build_corpus(args.seed, args.corpus)
+    results: Dict[str, Dict[str, Any]] = {}
+    try:
+        if args.only in (None, "micro"):
+            results.update(run_micro(corpus, args))
+        if args.only in (None, "api"):
+            results.update(asyncio.run(run_api(corpus, args)))
+    finally:
+        ocr_pool.shutdown()
+        hashing_pool.shutdown()
+
+    report = {
+        "environment": environment(),
+        "settings": {
+            "ocr_engine": args.ocr_engine if args.ocr_engine == "null" else settings.ocr_engine,
+            "ocr_executor": settings.ocr_executor,
+            "ocr_workers": ocr_pool.workers,
+            "bcrypt_rounds": settings.bcrypt_rounds,
+            "password_hash_workers": settings.password_hash_workers,
+        },
+        "args": vars(args),
+        "results": results,
+    }
+    print_results(results)
+    if args.output:
+        write_report(args.output, report)
+        print(f"\nwrote {args.output}")
+    mismatches = [name for name, result in results.items() if result.get("matches_whole_page") is False]
+    if mismatches:
+        print("\nregion_parallel text differs from whole-page OCR:\n  " + "\n  ".join(mismatches))
+    regressions = []
+    if args.baseline:
+        regressions = compare(results, load_report(args.baseline), args.threshold)
+        if regressions:
+            print("\nregressions:\n  " + "\n  ".join(regressions))
+    if mismatches or regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
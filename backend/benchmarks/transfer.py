@@ -0,0 +1,109 @@
+"""Round-trip documents through export and import, checking nothing is lost.
+
+    cd backend
+    python -m benchmarks.transfer --documents 200 --text-length 200000
+
+Documents are written with stream_export in each format and read back with
+ImportReader. The texts and timestamps must come back unchanged and without
+row errors; the default text length is over the csv module's 128K field
+limit, so a regression there fails the run. Export and import times are
+printed per format.
+"""
+import argparse
+import asyncio
+import io
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Tuple
+
+from bson import ObjectId
+
+from app.services.document_transfer import EXPORT_FORMATS, ImportReader, stream_export
+
+
+class ListCursor:
+    """Async iteration over a list, standing in for a Motor cursor"""
+
+    def __init__(self, docs: List[Dict[str, Any]]):
+        self._docs = iter(docs)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Dict[str, Any]:
+        try:
+            return next(self._docs)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+def make_documents(count: int, text_length: int) -> List[Dict[str, Any]]:
+    rng = random.Random(0)
+    # Quotes, commas and newlines make the CSV writer quote every field
+    words = ["lecture", "notes", "integral,", '"theorem"', "proof\n", "page", "the", "of", "and"]
+    user_id = ObjectId()
+    started = datetime(2024, 1, 1)
+    docs = []
+    for i in range(count):
+        text = " ".join(rng.choice(words) for _ in range(text_length // 5))[:text_length]
+        docs.append({
+            "_id": ObjectId(),
+            "user_id": user_id,
+            "original_text": text,
+            "corrected_text": text.upper() if i % 3 == 0 else None,
+            "created_at": started + timedelta(minutes=i),
+        })
+    return docs
+
+
+async def export(docs: List[Dict[str, Any]], fmt: str) -> bytes:
+    return b"".join([chunk async for chunk in stream_export(ListCursor(docs), fmt)])
+
+
+def import_back(data: bytes, fmt: str) -> Tuple[List[Dict[str, Any]], ImportReader]:
+    reader = ImportReader(io.BytesIO(data), fmt)
+    imported = []
+    while batch := reader.next_batch(100):
+        imported += batch
+    return imported, reader
+
+
+def check(docs: List[Dict[str, Any]], imported: List[Dict[str, Any]], reader: ImportReader) -> List[str]:
+    problems = [f"item {e['item']}: {e['detail']}" for e in reader.errors]
+    if len(imported) != len(docs):
+        problems.append(f"imported {len(imported)} of {len(docs)} documents")
+    for number, (doc, row) in enumerate(zip(docs, imported), start=1):
+        for field in ("original_text", "corrected_text", "created_at"):
+            if row[field] != doc[field]:
+                problems.append(f"document {number}: {field} differs")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=200)
+    parser.add_argument("--text-length", type=int, default=200000, help="characters per text")
+    args = parser.parse_args()
+
+    docs = make_documents(args.documents, args.text_length)
+    print(f"{args.documents} documents, {args.text_length}-character texts")
+    print(f"{'':<8}{'export ms':>12}{'import ms':>12}{'bytes':>14}")
+    failed = False
+    for fmt in EXPORT_FORMATS:
+        started = time.perf_counter()
+        data = asyncio.run(export(docs, fmt))
+        exported = time.perf_counter()
+        imported, reader = import_back(data, fmt)
+        finished = time.perf_counter()
+        print(f"{fmt:<8}{(exported - started) * 1000:>12.1f}{(finished - exported) * 1000:>12.1f}{len(data):>14}")
+        for problem in check(docs, imported, reader)[:10]:
+            failed = True
+            print(f"  {fmt}: {problem}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
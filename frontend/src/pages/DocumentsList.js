@@ -12,12 +12,40 @@ const DocumentsList = () => {
   const [searchTerm, setSearchTerm] = useState('');
   const [filterBy, setFilterBy] = useState('all'); // 'all', 'corrected', 'uncorrected'
   const [sortBy, setSortBy] = useState('newest'); // 'newest', 'oldest'
+  const [searchMatches, setSearchMatches] = useState(null); // ids the server matched for searchTerm
+  const [stats, setStats] = useState(null);
 
   useEffect(() => {
     fetchDocuments();
   }, []);
 
+  // Search runs on the server against the full texts, shortly after typing stops
+  useEffect(() => {
+    if (searchTerm.trim() === '') {
+      setSearchMatches(null);
+      return undefined;
+    }
+    const timer = setTimeout(async () => {
+      try {
+        const data = await documentService.searchDocuments(searchTerm.trim());
+        setSearchMatches(new Set(data.results.map(result => result.id || result._id)));
+      } catch (error) {
+        toast.error('Search failed');
+      }
+    }, 300);
+    return () => clearTimeout(timer);
+  }, [searchTerm]);
+
+  const fetchStats = async () => {
+    try {
+      setStats(await documentService.getDocumentStats());
+    } catch (error) {
+      setStats(null);
+    }
+  };
+
   const fetchDocuments = async () => {
+    fetchStats();
     try {
       const data = await documentService.getDocuments();
       setDocuments(data);
@@ -39,6 +67,7 @@ const DocumentsList = () => {
     try {
       await documentService.deleteDocument(documentId);
       setDocuments(prev => prev.filter(doc => (doc.id || doc._id) !== documentId));
+      fetchStats();
       toast.success('Document deleted successfully');
     } catch (error) {
       console.error('Delete error:', error);
@@ -64,9 +93,7 @@ const DocumentsList = () => {
   // Filter and sort documents
   const filteredAndSortedDocuments = documents
     .filter(doc => {
-      const matchesSearch = searchTerm === '' || 
-        doc.original_text?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-        doc.corrected_text?.toLowerCase().includes(searchTerm.toLowerCase());
+      const matchesSearch = searchMatches === null || searchMatches.has(doc.id || doc._id);
       
       const matchesFilter = filterBy === 'all' ||
         (filterBy === 'corrected' && doc.corrected_text) ||
@@ -249,10 +276,12 @@ const DocumentsList = () => {
           <div className="card p-4">
             <div className="flex items-center justify-between text-sm text-gray-600 dark:text-gray-400">
               <span>
-                Showing {filteredAndSortedDocuments.length} of {documents.length} documents
+                Showing {filteredAndSortedDocuments.length} of {stats ? stats.documents : documents.length} documents
               </span>
               <span>
-                {documents.filter(doc => doc.corrected_text).length} corrected
+                {stats
+                  ? `${stats.corrected} corrected (${Math.round(stats.correction_rate * 100)}%) · ${stats.original_characters.toLocaleString()} characters`
+                  : `${documents.filter(doc => doc.corrected_text).length} corrected`}
               </span>
             </div>
           </div>
@@ -12,6 +12,7 @@ const UploadDocument = () => {
   const [preview, setPreview] = useState(null);
   const [extractedText, setExtractedText] = useState('');
   const [correctedText, setCorrectedText] = useState('');
+  const [imageId, setImageId] = useState(null);
   const [loading, setLoading] = useState(false);
   const [saving, setSaving] = useState(false);
   const [step, setStep] = useState('upload'); // 'upload', 'preview', 'preprocess', 'edit'
@@ -68,6 +69,7 @@ const UploadDocument = () => {
       const result = await documentService.uploadImage(file, preprocessingOptions);
       setExtractedText(result.extracted_text);
       setCorrectedText(result.extracted_text);
+      setImageId(result.image_id || null);
       setStep('edit');
       toast.success('Text extracted successfully!');
     } catch (error) {
@@ -82,7 +84,7 @@ const UploadDocument = () => {
 
     setSaving(true);
     try {
-      await documentService.saveDocument(extractedText, correctedText);
+      await documentService.saveDocument(extractedText, correctedText, imageId);
       toast.success('Document saved successfully!');
       navigate('/documents');
     } catch (error) {
@@ -97,6 +99,7 @@ const UploadDocument = () => {
     setPreview(null);
     setExtractedText('');
     setCorrectedText('');
+    setImageId(null);
     setStep('upload');
   };
 
@@ -56,16 +56,49 @@ export const documentService = {
     return response.data;
   },
 
-  saveDocument: async (originalText, correctedText = null) => {
+  saveDocument: async (originalText, correctedText = null, imageId = null) => {
     const response = await api.post('/documents/', {
       original_text: originalText,
       corrected_text: correctedText,
+      // Links the stored upload when the server keeps images
+      ...(imageId && { image_id: imageId }),
     });
     return response.data;
   },
 
+  getDocumentsPage: async ({ cursor = null, limit = 100, view = 'summary' } = {}) => {
+    const response = await api.get('/documents/', {
+      params: { limit, view, ...(cursor && { cursor }) },
+    });
+    return {
+      documents: response.data,
+      nextCursor: response.headers['x-next-cursor'] || null,
+    };
+  },
+
   getDocuments: async () => {
-    const response = await api.get('/documents/');
+    // The list page shows every document, so follow the cursor to the end;
+    // summaries keep each page small
+    const documents = [];
+    let cursor = null;
+    do {
+      const page = await documentService.getDocumentsPage({ cursor });
+      documents.push(...page.documents);
+      cursor = page.nextCursor;
+    } while (cursor);
+    return documents;
+  },
+
+  searchDocuments: async (query, { limit = 100, offset = 0 } = {}) => {
+    const response = await api.get('/documents/search', {
+      params: { q: query, limit, offset },
+    });
+    return response.data;
+  },
+
+  // Counts kept up to date on the server, so they don't need the full list
+  getDocumentStats: async () => {
+    const response = await api.get('/documents/stats');
     return response.data;
   },
 
@@ -81,6 +114,12 @@ export const documentService = {
     return response.data;
   },
 
+  // operations: [{ op: 'create' | 'update' | 'delete', id, original_text, corrected_text }]
+  bulkDocuments: async (operations) => {
+    const response = await api.post('/documents/bulk', { operations });
+    return response.data;
+  },
+
   deleteDocument: async (id) => {
     const response = await api.delete(`/documents/${id}`);
     return response.data;